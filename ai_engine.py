@@ -1,28 +1,135 @@
-import whisper
 import sys
 import re
 import os
+import functools
+import audio_io
+import transcript_cache
+import transcribe_backends
+import model_manager
 
-# Load model once
-try:
-    model = whisper.load_model("base")
-except Exception as e:
-    print(f"Model loading error: {e}")
-    model = None
+# Engine comes from VERBAPOST_STT_BACKEND; models are loaded lazily (or pre-warmed)
+# by model_manager, never at import.
 
-def transcribe_audio(filename):
+# Whisper language codes for the store's language options.
+# Passing one skips Whisper's per-clip language detection.
+LANGUAGE_CODES = {"English": "en", "Japanese": "ja", "Chinese": "zh", "Korean": "ko"}
+# Sizes that have an English-only (".en") variant, which is faster and more accurate on English
+ENGLISH_ONLY_SIZES = {"tiny", "base", "small", "medium"}
+
+# Decoding settings per service tier. model=None means VERBAPOST_STT_MODEL.
+DECODE_PROFILES = {
+    "Standard": {"model": None, "beam_size": 1, "temperature": (0.0, 0.4, 0.8)},
+    "Civic": {"model": None, "beam_size": 1, "temperature": (0.0, 0.4, 0.8)},
+    "Heirloom": {"model": "small", "beam_size": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)},
+}
+DEFAULT_TIER = "Standard"
+
+def resolve_decode(language=None, tier=None):
+    """Returns (model_size, transcribe options) for a language hint and service tier."""
+    profile = DECODE_PROFILES.get(tier) or DECODE_PROFILES[DEFAULT_TIER]
+    model_size = profile["model"] or transcribe_backends.DEFAULT_MODEL
+    options = {"beam_size": profile["beam_size"], "temperature": profile["temperature"]}
+    code = LANGUAGE_CODES.get(language)
+    if code:
+        options["language"] = code
+    if code == "en" and model_size in ENGLISH_ONLY_SIZES:
+        model_size = f"{model_size}.en"
+    return model_size, options
+
+def cache_key(data, language=None, tier=None):
+    """Transcript cache key: the audio bytes plus everything that changes the output."""
+    model_size, options = resolve_decode(language, tier)
+    return transcript_cache.make_key(data, transcribe_backends.cache_name(model_size=model_size), options)
+
+def _get_model(model_size=None):
+    try:
+        return model_manager.get_model(model_size=model_size)
+    except Exception:
+        return None
+
+def transcribe_audio(audio, language=None, tier=None):
+    """audio: raw bytes, a buffer (e.g. st.audio_input's file) or a file path."""
+    data = audio_io.as_buffer(audio)
+    key = cache_key(data, language, tier)
+    cached = transcript_cache.get(key)
+    if cached is not None:
+        print("⚡ Transcript cache hit")
+        return cached
+
+    model_size, options = resolve_decode(language, tier)
+    model = _get_model(model_size)
     if model is None:
         return "Error: AI Model not loaded."
         
-    print(f"🎧 Transcribing {filename}...")
-    result = model.transcribe(filename)
-    return result["text"]
-
-def polish_text(text):
-    fillers = ["um", "uh", "ah", "like, you know", "you know"]
-    polished = text
-    for filler in fillers:
-        pattern = re.compile(re.escape(filler), re.IGNORECASE)
-        polished = pattern.sub("", polished)
-    polished = " ".join(polished.split())
-    return polished
+    print(f"🎧 Transcribing {len(data)} bytes of audio with {model.cache_name}...")
+    text = model.transcribe(audio_io.normalize_audio(data), **options)
+    transcript_cache.put(key, text, model.cache_name)
+    return text
+
+def transcribe_array(audio, language=None, tier=None):
+    """
+    Transcribes a 16 kHz float32 NumPy array (one segment of a longer dictation).
+    Raises RuntimeError if the model can't be loaded, so no error text is mistaken for a transcript.
+    """
+    model_size, options = resolve_decode(language, tier)
+    try:
+        model = model_manager.get_model(model_size=model_size)
+    except Exception as e:
+        raise RuntimeError(f"AI Model not loaded: {e}") from e
+    return model.transcribe(audio, **options)
+
+# --- POLISHING ---
+# Per-language filler words, matching the store's language options.
+# Only unambiguous forms are listed for Japanese/Chinese (no spaces to find word edges).
+FILLERS = {
+    "English": ["um", "umm", "uh", "uhh", "uhm", "ah", "er", "erm", "hmm", "like, you know", "you know"],
+    "Japanese": ["えーと", "えっと", "えーっと", "えー", "あのー", "うーん", "そのー"],
+    "Chinese": ["嗯", "呃", "那个那个", "就是说就是说"],
+    "Korean": ["음", "어", "그니까", "뭐랄까"],
+}
+# Fillers that are also common acronyms: left alone when written in capitals ("the ER room")
+ACRONYM_FILLERS = {
+    "English": ["ER", "AH"],
+}
+# Languages written with spaces get whole-word matching, so "um" never eats "umbrella"
+SPACED_LANGUAGES = {"English", "Korean"}
+
+def _trie_regex(words):
+    """Folds words into one prefix-trie regex, so matching cost doesn't grow with the list."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word.lower():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        ends = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if ends else body
+
+    return emit(trie)
+
+@functools.lru_cache(maxsize=None)
+def _filler_pattern(language):
+    alternation = _trie_regex(FILLERS.get(language, FILLERS["English"]))
+    if language in SPACED_LANGUAGES:
+        acronyms = ACRONYM_FILLERS.get(language)
+        guard = rf"(?!(?-i:{'|'.join(map(re.escape, acronyms))})(?!\w))" if acronyms else ""
+        # Also swallow the commas around it ("Um, I think" -> "I think",
+        # "it is, you know, nice" -> "it is nice")
+        return re.compile(rf"(?:,\s*)?(?<!\w){guard}(?:{alternation})(?!\w),?", re.IGNORECASE)
+    return re.compile(rf"(?:{alternation})[、，,]?")
+
+def polish_text(text, language="English"):
+    """Strips filler words and collapses whitespace in one regex pass."""
+    polished = _filler_pattern(language).sub("", text)
+    return " ".join(polished.split())
+
+def polish_batch(texts, language="English"):
+    """Polishes many transcripts with one compiled pattern; always one output per input."""
+    pattern = _filler_pattern(language)
+    return [" ".join(pattern.sub("", text).split()) for text in texts]
@@ -0,0 +1,162 @@
+import struct
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 16000       # What Whisper expects
+FRAME_MS = 30             # Energy is measured over 30ms frames
+SILENCE_FLOOR_DB = -45    # Frames quieter than this are always silence
+TRIM_PADDING_MS = 250     # Keep a little room around speech so words aren't clipped
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def as_buffer(audio):
+    """
+    Accepts bytes / bytearray / memoryview, a file-like object (BytesIO, Streamlit UploadedFile)
+    or a file path, and returns a bytes-like object, avoiding a copy where the source allows it.
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return audio
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            return f.read()
+    if hasattr(audio, "getbuffer"):
+        return audio.getbuffer()
+    if hasattr(audio, "getvalue"):
+        return audio.getvalue()
+    return audio.read()
+
+def is_wav(data):
+    return len(data) >= 12 and bytes(data[0:4]) == b"RIFF" and bytes(data[8:12]) == b"WAVE"
+
+def _parse_wav(data):
+    """Walks the RIFF chunks. Returns (format_tag, channels, rate, bits, data_offset, data_length)."""
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = bytes(data[pos:pos + 4])
+        (size,) = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                # The real format is the first two bytes of the SubFormat GUID
+                (tag,) = struct.unpack_from("<H", data, body + 24)
+            fmt = (tag, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF; take whatever is there
+            length = min(size, len(data) - body) if size not in (0, 0xFFFFFFFF) else len(data) - body
+            return fmt + (body, length)
+        pos = body + size + (size & 1)  # Chunks are word-aligned
+    raise ValueError("WAV has no data chunk")
+
+def _wav_samples(data):
+    """Returns (float32 array shaped (frames, channels), sample_rate)."""
+    tag, channels, rate, bits, offset, length = _parse_wav(data)
+    width = bits // 8
+    length -= length % (width * channels)
+    raw = memoryview(data)[offset:offset + length]
+
+    if tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        samples = np.frombuffer(raw, dtype="<f4")  # Zero-copy view
+    elif tag == WAVE_FORMAT_IEEE_FLOAT and bits == 64:
+        samples = np.frombuffer(raw, dtype="<f8").astype(np.float32)
+    elif tag == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif tag == WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    elif tag == WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif tag == WAVE_FORMAT_PCM and bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8  # Sign-extend
+        samples = ints.astype(np.float32) / 8388608.0
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {tag}, {bits}-bit)")
+    return samples.reshape(-1, channels), rate
+
+def to_mono(samples):
+    return samples[:, 0] if samples.shape[1] == 1 else samples.mean(axis=1, dtype=np.float32)
+
+def resample(audio, src_rate, dst_rate=SAMPLE_RATE):
+    """Polyphase resampling with scipy when available, linear interpolation otherwise."""
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    try:
+        from math import gcd
+        from scipy.signal import resample_poly
+        g = gcd(int(src_rate), int(dst_rate))
+        return resample_poly(audio, dst_rate // g, src_rate // g).astype(np.float32, copy=False)
+    except ImportError:
+        n_out = int(round(len(audio) * dst_rate / src_rate))
+        positions = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+def _ffmpeg_decode(data, sr=SAMPLE_RATE):
+    """Compressed formats (webm/ogg/mp3/m4a): pipe through ffmpeg, no temp files."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=bytes(data), capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')[-300:]}") from e
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+def decode_audio(audio, sr=SAMPLE_RATE):
+    """
+    Decodes to mono float32 at `sr`. WAV is parsed in-process; only other containers spawn ffmpeg.
+    A mono float32 WAV already at `sr` comes back as a read-only view of the input buffer.
+    """
+    data = as_buffer(audio)
+    if is_wav(data):
+        samples, rate = _wav_samples(data)
+        return resample(to_mono(samples), rate, sr)
+    return _ffmpeg_decode(data, sr)
+
+# --- NORMALIZATION ---
+def frame_energy_db(audio, sr=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """RMS level per frame in dBFS, computed in one vectorized pass."""
+    frame_len = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(rms + 1e-10), frame_len
+
+def silence_threshold_db(db):
+    """Adapts to the recording: 25 dB under its loud passages, but never below the floor."""
+    return max(SILENCE_FLOOR_DB, float(np.percentile(db, 90)) - 25)
+
+def trim_silence(audio, sr=SAMPLE_RATE):
+    """Drops leading and trailing silence. Returns a view, not a copy."""
+    db, frame_len = frame_energy_db(audio, sr)
+    if len(db) == 0:
+        return audio
+    voiced = np.flatnonzero(db >= silence_threshold_db(db))
+    if len(voiced) == 0:
+        return audio[:0]
+    pad = int(sr * TRIM_PADDING_MS / 1000)
+    start = max(0, voiced[0] * frame_len - pad)
+    end = min(len(audio), (voiced[-1] + 1) * frame_len + pad)
+    return audio[start:end]
+
+def check_size(data, max_bytes):
+    if max_bytes is not None and len(data) > max_bytes:
+        raise ValueError(f"Recording is too large ({len(data) / 1024 / 1024:.1f} MB, limit {max_bytes / 1024 / 1024:.0f} MB).")
+
+def normalize_audio(audio, sr=SAMPLE_RATE, max_bytes=None, trim=True):
+    """
+    The preprocessing stage every recording goes through before storage or transcription:
+    enforce the size cap, decode, downmix to mono, resample to `sr`, trim silence.
+    Raises ValueError if the input is larger than `max_bytes`.
+    """
+    data = as_buffer(audio)
+    check_size(data, max_bytes)
+    samples = decode_audio(data, sr)
+    return trim_silence(samples, sr) if trim else samples
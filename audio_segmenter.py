@@ -0,0 +1,54 @@
+import numpy as np
+import audio_io
+
+SAMPLE_RATE = audio_io.SAMPLE_RATE
+MIN_SILENCE_MS = 400      # A pause must last this long to become a cut point
+MIN_SEGMENT_S = 4         # Shorter pieces are merged into their neighbour
+MAX_SEGMENT_S = 28        # Whisper decodes 30s windows; never hand it more
+
+def load_audio(audio):
+    """Decodes and normalizes a path, bytes or buffer into 16 kHz mono float32 (see audio_io)."""
+    return audio_io.normalize_audio(audio)
+
+def find_silences(audio, sr=SAMPLE_RATE):
+    """Returns (start_frame, end_frame) runs of silence, using audio_io's adaptive threshold."""
+    db, frame_len = audio_io.frame_energy_db(audio, sr)
+    if len(db) == 0:
+        return [], frame_len
+    silent = np.concatenate(([False], db < audio_io.silence_threshold_db(db), [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    min_frames = max(1, MIN_SILENCE_MS // audio_io.FRAME_MS)
+    keep = (ends - starts) >= min_frames
+    return list(zip(starts[keep], ends[keep])), frame_len
+
+def split_on_silence(audio, sr=SAMPLE_RATE):
+    """
+    Splits audio into (start_sample, end_sample) spans, cutting in the middle of pauses.
+    Spans are at least MIN_SEGMENT_S long (except a short recording) and at most MAX_SEGMENT_S.
+    """
+    total = len(audio)
+    if total == 0:
+        return []
+    silences, frame_len = find_silences(audio, sr)
+    cuts = [int((s + e) // 2) * frame_len for s, e in silences]
+
+    min_len, max_len = int(MIN_SEGMENT_S * sr), int(MAX_SEGMENT_S * sr)
+    spans, start = [], 0
+    for cut in cuts + [total]:
+        # Pause-free stretches longer than Whisper's window are split hard
+        while cut - start > max_len:
+            spans.append((start, start + max_len))
+            start += max_len
+        if cut - start >= min_len or cut == total:
+            spans.append((start, cut))
+            start = cut
+
+    # A trailing scrap gets folded into the previous span if that still fits
+    if len(spans) > 1 and spans[-1][1] - spans[-1][0] < min_len and spans[-1][1] - spans[-2][0] <= max_len:
+        spans[-2:] = [(spans[-2][0], spans[-1][1])]
+    return [(s, e) for s, e in spans if e > s]
+
+def stitch(texts):
+    """Joins per-segment transcripts back together in order."""
+    return " ".join(t.strip() for t in texts if t and t.strip())
@@ -27,10 +27,9 @@ def sign_up(email, password, name, street, city, state, zip_code, language="Engl
         response = client.auth.sign_up({"email": email, "password": password})
         if response.user:
              try:
-                 # Ensure user row exists
-                 database.create_or_get_user(email)
-                 # Update Profile with Language
-                 database.update_user_profile(email, name, street, city, state, zip_code, language)
+                 # Create the user row and save the profile in one statement
+                 database.upsert_user(email, {"name": name, "street": street, "city": city,
+                                              "state": state, "zip": zip_code, "language": language})
              except Exception as db_err:
                  print(f"DB Sync Error: {db_err}")
              return response, None
@@ -44,7 +43,8 @@ def sign_in(email, password):
     try:
         response = client.auth.sign_in_with_password({"email": email, "password": password})
         if response.user:
-            try: database.create_or_get_user(email)
+            # Ensures the row exists and warms the profile cache for get_current_address
+            try: database.upsert_user(email)
             except: pass
             return response, None
         return None, "Login failed"
@@ -52,15 +52,6 @@ def sign_in(email, password):
 
 def get_current_address(email):
     try:
-        user = database.get_user_by_email(email)
-        if user:
-            return {
-                "name": user.address_name or "",
-                "street": user.address_street or "",
-                "city": user.address_city or "",
-                "state": user.address_state or "",
-                "zip": user.address_zip or "",
-                "language": user.language or "English"
-            }
+        return database.get_profile(email) or {}
     except: pass
     return {}
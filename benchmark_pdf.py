@@ -0,0 +1,155 @@
+"""
+PDF rendering benchmark suite.
+
+Covers short and long bodies in every language, with and without a signature,
+for single letters (render_pdf) and civic runs (one LetterTemplate stamped for
+several representatives). Records latency percentiles, peak Python memory and
+output size per case. Runs offline: fonts come from the vendored pack
+(CJK from the system Noto package, when installed).
+
+Usage:
+    python3 benchmark_pdf.py [--repeat 20] [--civic-recipients 3] [--json pdf_bench.json]
+
+Compare two JSON files across releases with:
+    python3 benchmark_pdf.py --compare old.json new.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import letter_format
+import signatures
+from pdf_size_report import SAMPLE_BODIES, RECIPIENT, SENDER, sample_signature
+
+BODY_LENGTHS = {"short": 1, "long": 12}   # Repeats of each language's sample paragraph
+CIVIC_REPS = [
+    "Sen. Jane Smith\n425 Dirksen Senate Office Building",
+    "Sen. John Roe\n317 Russell Senate Office Building",
+    "Rep. Alex Doe\n1420 Longworth House Office Building",
+    "Rep. Sam Poe\n2110 Rayburn House Office Building",
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def paragraph(language):
+    """The first paragraph of the language's sample body (the sample is one paragraph x 12)."""
+    return SAMPLE_BODIES[language][:len(SAMPLE_BODIES[language]) // 12]
+
+def single_case(body, language, signature):
+    return lambda: [letter_format.render_pdf(body, RECIPIENT, SENDER, False, language, signature)]
+
+def civic_case(body, language, signature, n_recipients):
+    def run():
+        template = letter_format.LetterTemplate(body, SENDER, False, language, signature)
+        return [template.stamp(rep) for rep in CIVIC_REPS[:n_recipients]]
+    return run
+
+def measure(fn, repeat):
+    """Runs fn once to warm up, then `repeat` timed runs. Returns latency, memory and size stats."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pdfs = fn()
+            times.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "p50_ms": percentile(times, 50),
+        "p90_ms": percentile(times, 90),
+        "p99_ms": percentile(times, 99),
+        "max_ms": max(times),
+        "peak_alloc_kb": peak / 1024,
+        "bytes": sum(len(p) for p in pdfs),
+        "bytes_per_letter": sum(len(p) for p in pdfs) / len(pdfs),
+        "letters": len(pdfs),
+    }
+
+def run_suite(repeat, civic_recipients, sig_path):
+    signature = signatures.from_image(sig_path)
+    results = []
+    for language in SAMPLE_BODIES:
+        for length, n in BODY_LENGTHS.items():
+            body = "\n\n".join([paragraph(language)] * n)
+            for signed in (False, True):
+                sig = signature if signed else None
+                cases = [
+                    ("single", single_case(body, language, sig)),
+                    ("civic", civic_case(body, language, sig, civic_recipients)),
+                ]
+                for mode, fn in cases:
+                    row = {"mode": mode, "language": language, "length": length, "signature": signed}
+                    row.update(measure(fn, repeat))
+                    results.append(row)
+                    print(f"{mode:<7}{language:<10}{length:<7}{'yes' if signed else 'no':<5}"
+                          f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                          f"{row['peak_alloc_kb'] / 1024:>9.1f}{row['bytes_per_letter'] / 1024:>9.1f}")
+    return results
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cjk_font": os.path.exists(letter_format.CJK_PATH),
+        "pypdf": letter_format.PYPDF_AVAILABLE,
+    }
+
+def compare(old_path, new_path):
+    """Prints p50 latency and size changes between two saved runs."""
+    with open(old_path) as f: old = {_case_key(r): r for r in json.load(f)["results"]}
+    with open(new_path) as f: new = {_case_key(r): r for r in json.load(f)["results"]}
+    print(f"{'case':<34}{'p50 ms':>16}{'KB/letter':>18}")
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        dt = (n["p50_ms"] - o["p50_ms"]) / o["p50_ms"]
+        ds = (n["bytes_per_letter"] - o["bytes_per_letter"]) / o["bytes_per_letter"]
+        flag = " ⚠️" if dt > 0.10 or ds > 0.10 else ""
+        print(f"{' '.join(map(str, key)):<34}{n['p50_ms']:>9.1f} ({dt:+.0%}){n['bytes_per_letter'] / 1024:>11.1f} ({ds:+.0%}){flag}")
+
+def _case_key(row):
+    return (row["mode"], row["language"], row["length"], "signed" if row["signature"] else "plain")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF rendering.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--civic-recipients", type=int, default=3, choices=range(1, len(CIVIC_REPS) + 1))
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two saved runs and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        raise SystemExit(0)
+
+    if not os.path.exists(letter_format.CJK_PATH):
+        print(f"⚠️  {letter_format.CJK_PATH} not found: CJK cases measure the Latin fallback")
+    logging.getLogger("fpdf").setLevel(logging.ERROR)  # One missing-glyph warning per CJK render otherwise
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sig_path = os.path.join(tmp, "signature.png")
+        sample_signature(sig_path)
+        print(f"\n{'mode':<7}{'language':<10}{'body':<7}{'sig':<5}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'peak MB':>9}{'KB/ltr':>9}")
+        results = run_suite(args.repeat, args.civic_recipients, sig_path)
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n📈 Process peak RSS: {max_rss_mb:.0f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "max_rss_mb": max_rss_mb,
+                       "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"💾 Saved to {args.json}")
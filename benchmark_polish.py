@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for ai_engine.polish_text / polish_batch.
+
+Times polishing on transcripts of growing length and fits the growth exponent
+(1.0 = linear in text length). Also checks that cost doesn't track the filler list size.
+
+Usage:
+    python3 benchmark_polish.py
+"""
+import math
+import random
+import time
+import ai_engine
+
+WORDS = ("dear mom i wanted to tell you about the umbrella we bought for the trip "
+         "and how everyone is doing here at home").split()
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+def make_transcript(n_chars, seed=0):
+    rng = random.Random(seed)
+    fillers = ai_engine.FILLERS["English"]
+    out, length = [], 0
+    while length < n_chars:
+        word = rng.choice(fillers) if rng.random() < 0.1 else rng.choice(WORDS)
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)[:n_chars]
+
+def best_time(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def growth_exponent(sizes, times):
+    """Least-squares slope of log(time) against log(size)."""
+    xs, ys = [math.log(s) for s in sizes], [math.log(t) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+if __name__ == "__main__":
+    ai_engine.polish_text("warm up the compiled pattern")
+
+    print(f"{'chars':>10}{'ms':>10}{'ns/char':>10}")
+    times = []
+    for n in SIZES:
+        text = make_transcript(n)
+        t = best_time(ai_engine.polish_text, text)
+        times.append(t)
+        print(f"{n:>10}{t * 1000:>10.2f}{t / n * 1e9:>10.1f}")
+    exponent = growth_exponent(SIZES, times)
+    print(f"\n📈 Growth exponent: {exponent:.2f} ({'linear' if exponent < 1.15 else 'SUPER-LINEAR'})")
+
+    # Batch vs one-at-a-time on 500 short transcripts
+    batch = [make_transcript(600, seed=i) for i in range(500)]
+    single = best_time(lambda: [ai_engine.polish_text(t) for t in batch])
+    batched = best_time(ai_engine.polish_batch, batch)
+    print(f"📦 500 transcripts: {single * 1000:.1f}ms one-by-one, {batched * 1000:.1f}ms batched")
+
+    # Filler list size should barely matter with the trie pattern
+    text = make_transcript(100_000)
+    base = best_time(ai_engine.polish_text, text)
+    original = ai_engine.FILLERS["English"]
+    ai_engine.FILLERS["English"] = original + [f"filler{i}" for i in range(500)]
+    ai_engine._filler_pattern.cache_clear()
+    big = best_time(ai_engine.polish_text, text)
+    ai_engine.FILLERS["English"] = original
+    ai_engine._filler_pattern.cache_clear()
+    print(f"📚 {len(original)} fillers: {base * 1000:.2f}ms, {len(original) + 500} fillers: {big * 1000:.2f}ms")
@@ -0,0 +1,55 @@
+"""
+Throughput benchmark for letter_format.render_batch.
+
+Renders the same batch of letters with 1..N render workers and reports
+letters/sec overall and per core, so scaling losses are easy to spot.
+
+Usage:
+    python3 benchmark_render.py [--letters 64] [--max-workers 4] [--language English]
+"""
+import argparse
+import os
+import time
+import letter_format
+
+BODY = "Dear Grandma,\n\nThank you so much for the birthday card. We are all doing well here. " * 10
+SENDER = "John Doe\n456 Oak Ave\nMemphis, TN 38103"
+
+def make_jobs(n, language):
+    return [{
+        "content": BODY,
+        "recipient_addr": f"Recipient {i}\n{100 + i} Main St\nNashville, TN 37201",
+        "return_addr": SENDER,
+        "is_heirloom": True,
+        "language": language,
+    } for i in range(n)]
+
+def run(jobs, workers):
+    """Letters/sec for one worker count. The pool is started and warmed before timing."""
+    letter_format.shutdown_batch_pool()
+    if workers > 1:
+        list(letter_format.render_batch(jobs[:workers], workers=workers))
+    start = time.perf_counter()
+    for _ in letter_format.render_batch(jobs, workers=workers):
+        pass
+    elapsed = time.perf_counter() - start
+    letter_format.shutdown_batch_pool()
+    return len(jobs) / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure batch PDF rendering throughput.")
+    parser.add_argument("--letters", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--language", default="English")
+    args = parser.parse_args()
+
+    letter_format.BATCH_LANGUAGES = [args.language]
+    jobs = make_jobs(args.letters, args.language)
+    letter_format.render_pdf(**jobs[0])  # Parse fonts in this process too (the workers=1 path)
+
+    print(f"\n{'workers':>8}{'letters/s':>12}{'per core':>10}{'scaling':>9}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        rate = run(jobs, workers)
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>12.1f}{rate / workers:>10.1f}{rate / baseline / workers:>8.0%}")
@@ -0,0 +1,124 @@
+"""
+Compares transcription backends and model sizes on a local audio corpus.
+
+Corpus layout: one audio file per clip with a reference transcript next to it
+    corpus/letter_01.wav
+    corpus/letter_01.txt
+
+Usage:
+    python3 benchmark_transcribe.py corpus/ --backends whisper,ct2 --models tiny,base,small --json results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import resource
+import time
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac")
+SAMPLE_RATE = 16000
+
+def load_corpus(corpus_dir):
+    clips = []
+    for name in sorted(os.listdir(corpus_dir)):
+        base, ext = os.path.splitext(name)
+        ref_path = os.path.join(corpus_dir, base + ".txt")
+        if ext.lower() in AUDIO_EXTENSIONS and os.path.exists(ref_path):
+            with open(ref_path, "r", encoding="utf-8") as f:
+                clips.append((os.path.join(corpus_dir, name), f.read()))
+    return clips
+
+def _words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """(substitutions + deletions + insertions) / reference words, via word-level edit distance."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+def _run_one(backend_name, model_size, clips, results):
+    """Runs in a fresh process so peak RSS belongs to this backend/model alone."""
+    import audio_segmenter
+    import transcribe_backends
+
+    # Decode up front: every backend gets identical arrays and decode time isn't billed to the model
+    audio = [(audio_segmenter.load_audio(path), ref) for path, ref in clips]
+
+    start = time.perf_counter()
+    backend = transcribe_backends.load_backend(backend_name, model_size)
+    load_seconds = time.perf_counter() - start
+
+    audio_seconds = wall_seconds = errors = 0.0
+    ref_words = 0
+    for samples, ref in audio:
+        start = time.perf_counter()
+        text = backend.transcribe(samples)
+        wall_seconds += time.perf_counter() - start
+        audio_seconds += len(samples) / SAMPLE_RATE
+        n = len(_words(ref))
+        errors += word_error_rate(ref, text) * n
+        ref_words += n
+
+    results.put({
+        "backend": backend_name,
+        "model": model_size,
+        "clips": len(audio),
+        "audio_seconds": round(audio_seconds, 2),
+        "load_seconds": round(load_seconds, 2),
+        "rtf": round(wall_seconds / audio_seconds, 3) if audio_seconds else None,
+        # ru_maxrss is kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "wer": round(errors / ref_words, 4) if ref_words else None,
+    })
+
+def run_benchmark(clips, backends, models):
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for backend_name in backends:
+        for model_size in models:
+            print(f"⏱️  {backend_name} / {model_size} ...")
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_one, args=(backend_name, model_size, clips, queue))
+            proc.start()
+            proc.join()
+            if proc.exitcode == 0 and not queue.empty():
+                rows.append(queue.get())
+            else:
+                print(f"❌ {backend_name} / {model_size} failed (exit code {proc.exitcode})")
+    return rows
+
+def print_table(rows):
+    header = f"{'backend':<10}{'model':<10}{'RTF':>8}{'peak RSS MB':>14}{'WER':>8}{'load s':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['backend']:<10}{r['model']:<10}{r['rtf']:>8}{r['peak_rss_mb']:>14}{r['wer']:>8}{r['load_seconds']:>9}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends on a local corpus.")
+    parser.add_argument("corpus", help="Directory of audio files with matching .txt references")
+    parser.add_argument("--backends", default="whisper,ct2")
+    parser.add_argument("--models", default="tiny,base,small")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    clips = load_corpus(args.corpus)
+    if not clips:
+        raise SystemExit(f"No audio/.txt pairs found in {args.corpus}")
+    print(f"🎧 {len(clips)} clips")
+
+    rows = run_benchmark(clips, args.backends.split(","), args.models.split(","))
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"💾 Saved to {args.json}")
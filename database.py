@@ -1,19 +1,114 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker, joinedload
+from sqlalchemy import create_engine, event, func, inspect, select, text, tuple_, update, Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker, joinedload, defer
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 from datetime import datetime
+import threading
+import time
 import streamlit as st
 from sqlalchemy.engine import Engine
+import pdf_cache
 
 Base = declarative_base()
 
-def get_engine() -> Engine:
+# --- CONFIG ---
+# Override in Streamlit Secrets:
+# [database]
+# pool_size = 5
+# max_overflow = 10
+# pool_timeout = 30
+# pool_recycle = 1800
+POOL_DEFAULTS = {
+    "pool_size": 5,         # Connections kept open per process
+    "max_overflow": 10,     # Extra connections allowed under burst load
+    "pool_timeout": 30,     # Seconds to wait for a free connection before erroring
+    "pool_recycle": 1800,   # Reopen connections older than this (server / proxy idle timeouts)
+    "pool_pre_ping": True,  # Test a connection on checkout; replaces ones the server dropped
+}
+
+PROFILE_TTL = 60       # Seconds a user's profile is served from the in-process cache
+ADMIN_PAGE_SIZE = 25   # Letters per admin queue page
+PREVIEW_CHARS = 75     # Length of the content preview the admin queue shows
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+_pool_stats = {"checkouts": 0, "checkins": 0, "connects": 0, "invalidations": 0,
+               "wait_total_s": 0.0, "wait_max_s": 0.0}
+_pool_stats_lock = threading.Lock()
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with _pool_stats_lock:
+                _pool_stats["wait_total_s"] += waited
+                _pool_stats["wait_max_s"] = max(_pool_stats["wait_max_s"], waited)
+
+def _load_pool_config():
+    config = dict(POOL_DEFAULTS)
+    try:
+        config.update(st.secrets.get("database", {}))
+    except Exception:
+        pass
+    return config
+
+def _database_url():
     try:
         db_url = st.secrets["connections"]["database_url"]
         if db_url.startswith("postgres://"):
             db_url = db_url.replace("postgres://", "postgresql://", 1)
-        return create_engine(db_url)
+        return db_url
     except:
-        return create_engine('sqlite:///verbapost.db')
+        return 'sqlite:///verbapost.db'
+
+def _count(name):
+    def listener(*args):
+        with _pool_stats_lock:
+            _pool_stats[name] += 1
+    return listener
+
+def get_engine() -> Engine:
+    """The process-wide engine (and its connection pool), created on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            engine = create_engine(_database_url(), poolclass=TimedQueuePool, **_load_pool_config())
+            event.listen(engine, "checkout", _count("checkouts"))
+            event.listen(engine, "checkin", _count("checkins"))
+            event.listen(engine, "connect", _count("connects"))
+            event.listen(engine, "invalidate", _count("invalidations"))
+            _engine = engine
+        return _engine
+
+def pool_stats():
+    """Pool occupancy right now plus checkout / wait counters since the engine was created."""
+    pool = get_engine().pool
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats["wait_avg_ms"] = stats["wait_total_s"] / stats["checkouts"] * 1000 if stats["checkouts"] else 0.0
+    stats.update({
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+    })
+    return stats
+
+def dispose_engine():
+    """Closes every pooled connection (e.g. after fork, or in tests)."""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
 
 class User(Base):
     __tablename__ = 'users'
@@ -40,119 +135,330 @@ class Letter(Base):
     recipient_city = Column(String, nullable=True)
     recipient_state = Column(String, nullable=True)
     recipient_zip = Column(String, nullable=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    # Handwriting family from the bundled font pack (Heirloom); None = default face
+    font = Column(String, nullable=True)
+    # SHA-256 of content, so the admin queue can find cached PDFs without loading the text
+    content_digest = Column(String(64), nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     author = relationship("User", back_populates="letters")
 
-def init_db():
-    Base.metadata.create_all(get_engine())
+    # Admin queue: WHERE status = 'Queued' ORDER BY created_at DESC
+    __table_args__ = (Index("ix_letters_status_created_at", "status", "created_at"),)
+
+# --- MIGRATIONS ---
+# create_all builds a fresh database at the latest schema but never alters existing tables.
+# Each migration brings an older database forward one step; schema_version records which
+# have run. Migrations must be idempotent, since on a fresh database create_all has already
+# done their work. Append new ones at the end; never renumber.
+def _migration_letter_font(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("letters")}
+    if "font" not in columns:
+        conn.execute(text("ALTER TABLE letters ADD COLUMN font VARCHAR"))
+
+def _migration_letter_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_letters_status_created_at ON letters (status, created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_letters_user_id ON letters (user_id)"))
+
+def _migration_letter_content_digest(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("letters")}
+    if "content_digest" not in columns:
+        conn.execute(text("ALTER TABLE letters ADD COLUMN content_digest VARCHAR(64)"))
+    # One-time backfill for letters still waiting in the queue; the rest fill in as they're written
+    rows = conn.execute(text(
+        "SELECT id, content FROM letters WHERE status = 'Queued' AND content_digest IS NULL"
+    )).fetchall()
+    for letter_id, content in rows:
+        conn.execute(text("UPDATE letters SET content_digest = :d WHERE id = :id"),
+                     {"d": pdf_cache.content_digest(content), "id": letter_id})
+
+MIGRATIONS = [
+    (1, "letters.font (Heirloom handwriting face)", _migration_letter_font),
+    (2, "letters (status, created_at) and (user_id) indexes", _migration_letter_indexes),
+    (3, "letters.content_digest", _migration_letter_content_digest),
+]
+
+def schema_version(engine=None):
+    """Highest applied migration, or 0 for a database that predates schema_version."""
+    engine = engine or get_engine()
+    if not inspect(engine).has_table("schema_version"):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+def migrate(engine=None):
+    """Applies pending migrations, each in its own transaction. Returns the versions applied."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description VARCHAR, applied_at TIMESTAMP)"))
+
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Several app processes may start at once; let one migrate at a time
+                conn.execute(text("SELECT pg_advisory_xact_lock(7400281)"))
+            if conn.execute(text("SELECT 1 FROM schema_version WHERE version = :v"), {"v": version}).first():
+                continue
+            migration(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()},
+            )
+            print(f"🛠️ Migration {version}: {description}")
+            applied.append(version)
+    return applied
+
+def init_db(engine=None):
+    engine = engine or get_engine()
+    Base.metadata.create_all(engine)
+    return migrate(engine)
 
 def get_session():
-    return sessionmaker(bind=get_engine())()
+    """A new Session from the cached factory. The caller closes it; prefer session_scope()."""
+    global _session_factory
+    if _session_factory is None:
+        engine = get_engine()
+        with _engine_lock:
+            if _session_factory is None:
+                # Objects stay readable after commit; helpers return them detached
+                _session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+    return _session_factory()
 
-def get_user_by_email(email):
+@contextmanager
+def session_scope():
+    """Session that commits on success, rolls back on error and always closes."""
     session = get_session()
-    user = session.query(User).filter_by(email=email).first()
-    session.close()
-    return user
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
-def create_or_get_user(email):
-    session = get_session()
-    user = session.query(User).filter_by(email=email).first()
+# --- USER PROFILES ---
+PROFILE_FIELDS = {
+    "name": "address_name",
+    "street": "address_street",
+    "city": "address_city",
+    "state": "address_state",
+    "zip": "address_zip",
+    "language": "language",
+}
+
+def _profile_from_row(row):
+    profile = {key: getattr(row, column) or "" for key, column in PROFILE_FIELDS.items()}
+    profile["language"] = profile["language"] or "English"
+    return profile
+
+def _cache_profile(email, profile):
+    with _profiles_lock:
+        _profiles[email] = (time.monotonic() + PROFILE_TTL, profile)
+
+def invalidate_profile(email):
+    with _profiles_lock:
+        _profiles.pop(email, None)
+
+def upsert_user(email, profile=None):
+    """
+    Creates the user if needed and, when `profile` is given ({"name", "street", "city",
+    "state", "zip", "language"}), writes it, in one INSERT ... ON CONFLICT ... RETURNING.
+    Returns the stored profile dict, which also refreshes the profile cache.
+    """
+    updates = {column: profile[key] for key, column in PROFILE_FIELDS.items() if key in profile} if profile else {}
+    values = {"username": email, "email": email, "language": "English", **updates}
+    returning = [getattr(User, column) for column in PROFILE_FIELDS.values()]
+
+    with session_scope() as session:
+        dialect = session.get_bind().dialect
+        insert = None
+        # RETURNING needs SQLite 3.35+; SQLAlchemy reports what this build supports
+        if dialect.insert_returning and dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect.insert_returning and dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+
+        if insert is None:
+            # No ON CONFLICT ... RETURNING: fall back to select-then-write
+            user = session.query(User).filter_by(email=email).first()
+            if not user:
+                user = User(**values)
+                session.add(user)
+            else:
+                for column, value in updates.items():
+                    setattr(user, column, value)
+            session.flush()
+            row = user
+        else:
+            stmt = insert(User).values(**values)
+            # With nothing to update (plain sign-in) a no-op SET still makes RETURNING yield the row
+            set_ = {column: stmt.excluded[column] for column in updates} or {"email": stmt.excluded.email}
+            stmt = stmt.on_conflict_do_update(index_elements=[User.email], set_=set_).returning(*returning)
+            row = session.execute(stmt).one()
+
+    result = _profile_from_row(row)
+    _cache_profile(email, result)
+    return dict(result)
+
+def get_profile(email):
+    """The user's saved profile dict (see upsert_user), or None. Cached for PROFILE_TTL seconds."""
+    with _profiles_lock:
+        hit = _profiles.get(email)
+    if hit and hit[0] > time.monotonic():
+        return dict(hit[1])
+    user = get_user_by_email(email)
     if not user:
-        user = User(username=email, email=email, language="English")
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    session.close()
-    return user
+        return None
+    profile = _profile_from_row(user)
+    _cache_profile(email, profile)
+    return dict(profile)
+
+def get_user_by_email(email):
+    with session_scope() as session:
+        return session.query(User).filter_by(email=email).first()
+
+def create_or_get_user(email):
+    with session_scope() as session:
+        user = session.query(User).filter_by(email=email).first()
+        if not user:
+            user = User(username=email, email=email, language="English")
+            session.add(user)
+            session.flush()
+        return user
 
 # UPDATED: Now saves language too
 def update_user_profile(email, name, street, city, state, zip_code, language="English"):
-    session = get_session()
     try:
-        user = session.query(User).filter_by(email=email).first()
-        if user:
-            user.address_name = name
-            user.address_street = street
-            user.address_city = city
-            user.address_state = state
-            user.address_zip = zip_code
-            user.language = language
-            session.commit()
+        upsert_user(email, {"name": name, "street": street, "city": city,
+                            "state": state, "zip": zip_code, "language": language})
     except Exception as e:
+        invalidate_profile(email)
         print(f"DB Error: {e}")
-    finally:
-        session.close()
 
 # Backwards compatibility wrapper
 def update_user_address(email, name, street, city, state, zip_code):
     update_user_profile(email, name, street, city, state, zip_code)
 
 def save_draft(email, r_name, r_street, r_city, r_state, r_zip):
-    session = get_session()
     try:
-        user = session.query(User).filter_by(email=email).first()
-        if not user:
-            user = User(username=email, email=email)
-            session.add(user)
-            session.commit()
-            
-        draft = Letter(
-            author=user,
-            status="Draft",
-            recipient_name=r_name,
-            recipient_street=r_street,
-            recipient_city=r_city,
-            recipient_state=r_state,
-            recipient_zip=r_zip,
-            content=""
-        )
-        session.add(draft)
-        session.commit()
-        session.refresh(draft)
-        return draft.id
+        with session_scope() as session:
+            user = session.query(User).filter_by(email=email).first()
+            if not user:
+                user = User(username=email, email=email)
+                session.add(user)
+
+            draft = Letter(
+                author=user,
+                status="Draft",
+                recipient_name=r_name,
+                recipient_street=r_street,
+                recipient_city=r_city,
+                recipient_state=r_state,
+                recipient_zip=r_zip,
+                content="",
+                content_digest=pdf_cache.content_digest("")
+            )
+            session.add(draft)
+            session.flush()
+            return draft.id
     except Exception as e:
         print(f"Draft Error: {e}")
         return None
-    finally:
-        session.close()
 
 def get_letter(letter_id):
-    session = get_session()
-    letter = session.query(Letter).filter_by(id=letter_id).first()
-    session.close()
-    return letter
+    with session_scope() as session:
+        return session.query(Letter).filter_by(id=letter_id).first()
 
 def get_admin_queue():
-    session = get_session()
-    try:
-        letters = session.query(Letter).options(joinedload(Letter.author)).filter(Letter.status == 'Queued').order_by(Letter.created_at.desc()).all()
-        session.expunge_all() 
-        return letters
-    finally:
-        session.close()
+    with session_scope() as session:
+        return session.query(Letter).options(joinedload(Letter.author)).filter(Letter.status == 'Queued').order_by(Letter.created_at.desc()).all()
+
+def get_admin_queue_page(after=None, limit=ADMIN_PAGE_SIZE):
+    """
+    One page of the Queued letters, newest first, using keyset pagination:
+    pass the returned `next_after` (created_at, id) back in as `after` for the next page.
+    `content` is not loaded; each letter carries a server-side `preview` substring instead.
+    Returns (letters, total_queued, next_after), with next_after None on the last page.
+    """
+    with session_scope() as session:
+        preview = func.substr(Letter.content, 1, PREVIEW_CHARS).label("preview")
+        query = (
+            session.query(Letter, preview)
+            .options(defer(Letter.content), joinedload(Letter.author))
+            .filter(Letter.status == 'Queued')
+        )
+        if after:
+            query = query.filter(tuple_(Letter.created_at, Letter.id) < tuple_(*after))
+        rows = query.order_by(Letter.created_at.desc(), Letter.id.desc()).limit(limit + 1).all()
+        # Counted from the (status, created_at) index; no table rows are read
+        total = session.query(func.count()).select_from(Letter).filter(Letter.status == 'Queued').scalar()
+
+    letters = []
+    for letter, text_preview in rows[:limit]:
+        letter.preview = text_preview or ""
+        letters.append(letter)
+    next_after = (letters[-1].created_at, letters[-1].id) if len(rows) > limit else None
+    return letters, total, next_after
+
+def get_letter_contents(letter_ids):
+    """{id: content} for just these letters (e.g. one admin page whose PDFs are needed)."""
+    if not letter_ids:
+        return {}
+    with session_scope() as session:
+        return dict(session.query(Letter.id, Letter.content).filter(Letter.id.in_(letter_ids)).all())
 
 def mark_as_sent(letter_id):
-    session = get_session()
-    try:
+    with session_scope() as session:
         letter = session.query(Letter).filter_by(id=letter_id).first()
         if letter:
             letter.status = "Sent"
-            session.commit()
-    finally:
-        session.close()
-        
-def update_letter_status(letter_id, new_status, content=None):
-    session = get_session()
-    try:
+
+def update_status_bulk(letter_ids, from_status, to_status):
+    """
+    Moves letters from `from_status` to `to_status` in a single guarded UPDATE.
+    Letters no longer in `from_status` (e.g. already marked from another tab) are left alone.
+    Returns the ids that actually changed.
+    """
+    if not letter_ids:
+        return []
+    guard = (Letter.id.in_(list(letter_ids)), Letter.status == from_status)
+    stmt = update(Letter).where(*guard).values(status=to_status).execution_options(synchronize_session=False)
+    with session_scope() as session:
+        if session.get_bind().dialect.update_returning:
+            return list(session.execute(stmt.returning(Letter.id)).scalars())
+        # No UPDATE ... RETURNING (older SQLite / MySQL). FOR UPDATE locks the rows where the
+        # dialect supports it (SQLite ignores it), so the UPDATE keeps the full guard: a letter
+        # that left from_status after the SELECT is still left alone.
+        candidates = list(session.execute(select(Letter.id).where(*guard).with_for_update()).scalars())
+        if not candidates:
+            return []
+        result = session.execute(stmt)
+        if result.rowcount == len(candidates):
+            return candidates
+        # Some candidates changed in between: report those now in to_status (without RETURNING,
+        # one moved there concurrently by someone else can't be told apart)
+        return list(session.execute(
+            select(Letter.id).where(Letter.id.in_(candidates), Letter.status == to_status)
+        ).scalars())
+
+def update_letter_status(letter_id, new_status, content=None, font=None):
+    print_job = None
+    with session_scope() as session:
         letter = session.query(Letter).filter_by(id=letter_id).first()
         if letter:
             letter.status = new_status
             if content:
                 letter.content = content
-            session.commit()
-    finally:
-        session.close()
+                letter.content_digest = pdf_cache.content_digest(content)
+            if font:
+                letter.font = font
+            if new_status == "Queued":
+                print_job = pdf_cache.letter_job(letter)
+
+    # Render the print PDF now, so the admin queue only ever reads it from the cache
+    if print_job:
+        pdf_cache.prerender(print_job)
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
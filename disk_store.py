@@ -0,0 +1,105 @@
+import os
+import threading
+
+class DiskStore:
+    """
+    A bounded directory of files named by key. Writes are atomic (temp file + os.replace),
+    reads refresh an entry's mtime, and the least-recently-used entries are evicted once
+    either the entry count or the total size goes over its limit. Safe to share between
+    threads and processes; the hit/miss counters are per process.
+    """
+    def __init__(self, directory, suffix, max_entries, max_bytes, label="Cache"):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.label = label
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key):
+        """Returns the stored bytes or None. A hit refreshes the entry's LRU position."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+        except OSError:
+            with self._lock: self._stats["misses"] += 1
+            return None
+        with self._lock: self._stats["hits"] += 1
+        return data
+
+    def reject(self, key):
+        """For a get() whose bytes turned out unusable: drop the entry and count a miss instead."""
+        try: os.remove(self._path(key))
+        except OSError: pass
+        with self._lock:
+            self._stats["hits"] -= 1
+            self._stats["misses"] += 1
+
+    def put(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # Atomic, so concurrent readers never see half a file
+        except OSError as e:
+            print(f"❌ {self.label} write failed: {e}")
+            return
+        with self._lock: self._stats["writes"] += 1
+        self._evict()
+
+    def _scan(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.suffix):
+                        try:
+                            info = entry.stat()
+                            entries.append((info.st_mtime, info.st_size, entry.path))
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Drops least-recently-used entries until both the count and size bounds hold."""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if len(entries) <= self.max_entries and total <= self.max_bytes:
+            return
+        entries.sort()
+        evicted = 0
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                evicted += 1
+            except OSError:
+                pass
+            total -= size
+        with self._lock: self._stats["evictions"] += evicted
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current on-disk footprint."""
+        entries = self._scan()
+        with self._lock:
+            result = dict(self._stats)
+        lookups = result["hits"] + result["misses"]
+        result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+        result["entries"] = len(entries)
+        result["bytes"] = sum(size for _, size, _ in entries)
+        return result
+
+    def clear(self):
+        for _, _, path in self._scan():
+            try: os.remove(path)
+            except OSError: pass
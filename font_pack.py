@@ -0,0 +1,88 @@
+"""
+The fonts VerbaPost renders with, vendored under fonts/ and listed in fonts/manifest.json
+with their size and SHA-256. Nothing here touches the network: a family whose files are
+missing or don't match the manifest is reported by verify() and simply not offered,
+and letter_format falls back to the PDF core fonts.
+
+To add a face: drop the TTF in fonts/, then add it to the manifest with
+`sha256sum` and `wc -c` output. A "sans" family needs a "" and a "B" file.
+"""
+import os
+import json
+import hashlib
+import threading
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+MANIFEST_PATH = os.path.join(FONT_DIR, "manifest.json")
+DEFAULT_HAND = "Caveat"
+
+_report = None
+_report_lock = threading.Lock()
+
+def load_manifest():
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _check_file(entry):
+    """Returns None if the file matches its manifest entry, otherwise what is wrong."""
+    path = os.path.join(FONT_DIR, entry["file"])
+    try:
+        size = os.path.getsize(path)
+        if size != entry["bytes"]:
+            return f"{entry['file']}: {size} bytes, expected {entry['bytes']}"
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        if digest.hexdigest() != entry["sha256"]:
+            return f"{entry['file']}: checksum mismatch"
+    except OSError as e:
+        return f"{entry['file']}: {e.strerror or e}"
+    return None
+
+def verify(force=False):
+    """
+    Checks every manifest file once per process (or again with force=True).
+    Returns {family: {"ok": bool, "role", "label", "size", "paths": {style: path}, "errors": [...]}}.
+    """
+    global _report
+    with _report_lock:
+        if _report is not None and not force:
+            return _report
+        report = {}
+        try:
+            families = load_manifest()["families"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Font manifest unreadable: {e}")
+            families = {}
+        for family, spec in families.items():
+            errors = [err for err in (_check_file(entry) for entry in spec["files"].values()) if err]
+            report[family] = {
+                "ok": not errors,
+                "role": spec.get("role"),
+                "label": spec.get("label", family),
+                "size": spec.get("size", 12),
+                "paths": {style: os.path.join(FONT_DIR, entry["file"]) for style, entry in spec["files"].items()},
+                "errors": errors,
+            }
+            if errors:
+                print(f"❌ Font {family} failed verification: {'; '.join(errors)}")
+        ok = sum(1 for info in report.values() if info["ok"])
+        print(f"🔤 Font pack: {ok}/{len(report)} families verified")
+        _report = report
+        return report
+
+def get_family(family):
+    """The verified manifest entry for a family, or None."""
+    info = verify().get(family)
+    return info if info and info["ok"] else None
+
+def families(role):
+    """Verified families with the given role ("hand" or "sans"), default face first."""
+    names = [f for f, info in verify().items() if info["ok"] and info["role"] == role]
+    return sorted(names, key=lambda f: f != DEFAULT_HAND)
+
+def handwriting_choices():
+    """{family: label} for the handwriting faces Heirloom customers can pick from."""
+    report = verify()
+    return {f: report[f]["label"] for f in families("hand")}
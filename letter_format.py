@@ -1,80 +1,202 @@
 from fpdf import FPDF
+from fontTools import ttLib
+try:
+    from fpdf.fonts import SubsetMap
+except ImportError:  # Older fpdf2: register_font falls back to add_font
+    SubsetMap = None
 import os
-import requests
+import copy
+import threading
+import multiprocessing
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+import signatures
+import font_pack
+
+# Optional: stamping recipient blocks onto a pre-rendered letter (LetterTemplate)
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
 
 # --- FONT SOURCES ---
-FONTS = {
-    "Caveat": "https://github.com/google/fonts/raw/main/ofl/caveat/Caveat-Regular.ttf",
-    "Roboto": "https://github.com/google/fonts/raw/main/apache/roboto/Roboto-Regular.ttf",
-    "Roboto-Bold": "https://github.com/google/fonts/raw/main/apache/roboto/Roboto-Bold.ttf"
-}
+# Latin faces come from the vendored pack (font_pack); CJK from the system fonts-noto-cjk package
 CJK_PATH = "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"
 
-def ensure_fonts():
-    """Downloads fonts to current directory."""
-    for name, url in FONTS.items():
-        filename = f"{name}.ttf"
-        if not os.path.exists(filename):
-            try:
-                r = requests.get(url, allow_redirects=True)
-                if r.status_code == 200:
-                    with open(filename, "wb") as f:
-                        f.write(r.content)
-                    print(f"✅ Downloaded {name}")
-                else:
-                    print(f"❌ Failed to download {name}: {r.status_code}")
-            except Exception as e:
-                print(f"❌ Error downloading {name}: {e}")
+# --- BATCH RENDERING ---
+BATCH_WORKERS = os.cpu_count() or 1   # Render processes for render_batch()
+BATCH_LANGUAGES = ["English"]         # Fonts each render worker parses before its first job
 
-def create_pdf(content, recipient_addr, return_addr, is_heirloom, language, filename="letter.pdf", signature_path=None):
-    # 1. Ensure fonts exist locally
-    ensure_fonts()
-    
-    # FIXED: Force 'Letter' size (8.5x11) for Lob compatibility
-    pdf = FPDF(format='Letter')
-    
-    # 2. REGISTER FONTS (MUST BE BEFORE ADD_PAGE)
-    # We use try/except blocks to prevent crashing if a font is corrupt
-    font_map = {}
-    
-    # English Handwriting
-    if os.path.exists("Caveat.ttf"):
-        try:
-            pdf.add_font('Caveat', '', 'Caveat.ttf', uni=True)
-            font_map['hand'] = 'Caveat'
-        except: font_map['hand'] = 'Helvetica'
+def _draw_signature(pdf, signature):
+    """
+    Draws a signature at the cursor, at the canvas's printed scale. Strokes from the
+    canvas are drawn as vector paths; otherwise the 1-bit ink mask is embedded.
+    Accepts a signatures.Signature, a PIL image or an image path.
+    """
+    if not isinstance(signature, signatures.Signature):
+        signature = signatures.from_image(signature)
+    if signature is None:
+        return
+    pdf.ln(10)
+    x, y = pdf.get_x(), pdf.get_y()
+    if signature.strokes:
+        scale = signatures.SIGNATURE_WIDTH_MM / signature.canvas_width
+        with pdf.new_path() as path:
+            path.auto_close = False
+            path.style.fill_color = None
+            path.style.stroke_color = "#000000"
+            path.style.stroke_width = signature.stroke_width * scale
+            path.style.stroke_cap_style = "ROUND"
+            path.style.stroke_join_style = "ROUND"
+            for stroke in signature.strokes:
+                for op, *coords in stroke:
+                    points = [c * scale + (x if i % 2 == 0 else y) for i, c in enumerate(coords)]
+                    if op == "M": path.move_to(*points)
+                    elif op == "L": path.line_to(*points)
+                    elif op == "Q": path.quadratic_curve_to(*points)
+        pdf.set_y(y + signature.height_mm)
     else:
-        font_map['hand'] = 'Helvetica'
+        pdf.image(signature.to_image(), w=signature.width_mm)
 
-    # Professional Sans
-    if os.path.exists("Roboto.ttf") and os.path.exists("Roboto-Bold.ttf"):
-        try:
-            pdf.add_font('Roboto', '', 'Roboto.ttf', uni=True)
-            pdf.add_font('Roboto', 'B', 'Roboto-Bold.ttf', uni=True)
-            font_map['sans'] = 'Roboto'
-        except: font_map['sans'] = 'Helvetica'
-    else:
-        font_map['sans'] = 'Helvetica'
+# --- FONT REGISTRY ---
+# Parsing a TTF (cmap + per-glyph widths) is the expensive part of add_font, and for the
+# NotoSansCJK collection it runs to tens of thousands of glyphs. Each font is parsed once
+# per process here; every PDF gets a cheap per-document copy of the parsed metrics.
+CJK_LANGUAGES = ["Japanese", "Chinese", "Korean"]
+_parsed_fonts = {}
+_parsed_fonts_lock = threading.Lock()
+_fallback_warned = set()
+
+def _parse_font(family, style, path):
+    key = (family, style, path)
+    with _parsed_fonts_lock:
+        if key not in _parsed_fonts:
+            parser = FPDF()
+            parser.add_font(family, style, path)
+            _parsed_fonts[key] = parser.fonts[f"{family.lower()}{style}"]
+        return _parsed_fonts[key]
 
-    # CJK
-    if os.path.exists(CJK_PATH):
+def register_font(pdf, family, style, path):
+    """Adds a font to `pdf` from the process-wide registry."""
+    font = _parse_font(family, style, path)
+    try:
+        if font.color_font is not None:
+            raise ValueError("color fonts are bound to the document that parsed them")
+        doc_font = copy.copy(font)
+        # fpdf subsets ttfont in place at output, so each document needs its own handle.
+        # Opening lazily only reads the table directory; the parsed metrics are shared.
+        doc_font.ttfont = ttLib.TTFont(
+            path, recalcTimestamp=False, fontNumber=font.collection_font_number, lazy=True
+        )
+        doc_font._hbfont = None
+        doc_font.i = len(pdf.fonts) + 1
+        doc_font.biggest_size_pt = 0
+        doc_font.missing_glyphs = []
+        doc_font.subset = SubsetMap(doc_font)
+        doc_font.color_font = None
+        pdf.fonts[font.fontkey] = doc_font
+    except Exception as e:
+        # Unexpected fpdf internals: fall back to a regular (uncached) parse. That works,
+        # but re-parses the font for every letter, so say so once per font.
+        if font.fontkey not in _fallback_warned:
+            _fallback_warned.add(font.fontkey)
+            print(f"⚠️ Font registry bypassed for {family}{style} ({type(e).__name__}: {e}); "
+                  f"parsing per document. Check fpdf2 version.")
+        pdf.add_font(family, style, path)
+
+def load_fonts(pdf, language, hand_font=None):
+    """
+    Registers only the fonts this letter's language uses, all from local files.
+    hand_font picks a bundled handwriting family (default font_pack.DEFAULT_HAND).
+    Returns the role -> family map, plus the body size for the handwriting face.
+    """
+    font_map = {'hand': 'Helvetica', 'sans': 'Helvetica', 'hand_size': 12}
+
+    # CJK letters use Noto for everything, so skip the Latin fonts entirely
+    if language in CJK_LANGUAGES and os.path.exists(CJK_PATH):
         try:
-            pdf.add_font('NotoCJK', '', CJK_PATH, uni=True)
+            register_font(pdf, 'NotoCJK', '', CJK_PATH)
             font_map['cjk'] = 'NotoCJK'
-        except: pass
+            return font_map
+        except Exception: pass
+
+    # Handwriting (unknown or unverified choices fall back to the default face)
+    for family in [hand_font, font_pack.DEFAULT_HAND]:
+        info = font_pack.get_family(family) if family else None
+        if info:
+            try:
+                register_font(pdf, family, '', info['paths'][''])
+                font_map['hand'] = family
+                font_map['hand_size'] = info['size']
+                break
+            except Exception: pass
+
+    font_map['sans'] = load_sans(pdf)
+    return font_map
+
+def load_sans(pdf):
+    """Registers the pack's sans (regular + bold) and returns its family; core Helvetica if none verified."""
+    for family in font_pack.families('sans')[:1]:
+        info = font_pack.get_family(family)
+        try:
+            register_font(pdf, family, '', info['paths'][''])
+            register_font(pdf, family, 'B', info['paths']['B'])
+            return family
+        except Exception: pass
+    return 'Helvetica'
+
+def _draw_recipient(pdf, addr_font, recipient_addr):
+    pdf.set_xy(20, 40)
+    # Bold where the family has it (core Helvetica and the pack's sans; not NotoCJK / handwriting)
+    has_bold = addr_font == 'Helvetica' or f"{addr_font.lower()}B" in pdf.fonts
+    pdf.set_font(addr_font, 'B' if has_bold else '', 12)
+    pdf.multi_cell(0, 6, recipient_addr)
+
+def _add_cjk_fallback(pdf, family, text):
+    """Names in Hangul / Han / Kana on a Latin letter: let fpdf borrow those glyphs from Noto CJK."""
+    font = pdf.fonts.get(family.lower())
+    if font is None or family == 'NotoCJK' or not os.path.exists(CJK_PATH):
+        return
+    if all(ch.isspace() or ord(ch) in font.cmap for ch in text):
+        return
+    try:
+        register_font(pdf, 'NotoCJK', '', CJK_PATH)
+        pdf.set_fallback_fonts(['NotoCJK'], exact_match=False)
+    except Exception as e:
+        print(f"⚠️ CJK fallback font unavailable: {e}")
+
+def build_pdf(content, recipient_addr, return_addr, is_heirloom, language, signature=None, hand_font=None):
+    """Lays out a letter and returns the FPDF document, ready for output."""
+    # FIXED: Force 'Letter' size (8.5x11) for Lob compatibility
+    pdf = FPDF(format='Letter')
+    # Deflate content streams (fpdf2's default, made explicit). TTF fonts are
+    # embedded as subsets of the glyphs actually used when the PDF is written.
+    pdf.set_compression(True)
+    
+    # REGISTER FONTS (MUST BE BEFORE ADD_PAGE)
+    # Parsed once per process; Helvetica is the fallback if a font is missing or corrupt
+    font_map = load_fonts(pdf, language, hand_font)
 
     pdf.add_page()
     
     # --- LOGIC: SELECT FONT ---
-    if language in ["Japanese", "Chinese", "Korean"] and 'cjk' in font_map:
+    if language in CJK_LANGUAGES and 'cjk' in font_map:
         body_font = font_map['cjk']
         addr_font = font_map['cjk']
         body_size = 12
     else:
-        body_font = font_map['hand'] # Caveat
-        addr_font = font_map['sans'] # Roboto
-        body_size = 16 if body_font == 'Caveat' else 12
+        body_font = font_map['hand'] # Caveat unless the customer picked another face
+        addr_font = font_map['sans']
+        body_size = font_map['hand_size']
+
+    # Core Helvetica only encodes Latin-1 (no ’, Ł, Hangul...). If the pack's sans
+    # didn't load, set addresses in the handwriting TTF rather than fail the send.
+    addr_text = f"{return_addr}\n{recipient_addr or ''}"
+    if addr_font == 'Helvetica' and not _core_font_safe(addr_text):
+        addr_font = body_font
+    _add_cjk_fallback(pdf, addr_font, addr_text)
 
     # --- LAYOUT ---
     
@@ -84,9 +206,8 @@ def create_pdf(content, recipient_addr, return_addr, is_heirloom, language, file
     pdf.multi_cell(0, 5, return_addr)
     
     # 2. Recipient (Window)
-    pdf.set_xy(20, 40)
-    pdf.set_font(addr_font, 'B' if addr_font != 'NotoCJK' else '', 12)
-    pdf.multi_cell(0, 6, recipient_addr)
+    if recipient_addr:
+        _draw_recipient(pdf, addr_font, recipient_addr)
     
     # 3. Date
     pdf.set_xy(160, 10)
@@ -99,15 +220,148 @@ def create_pdf(content, recipient_addr, return_addr, is_heirloom, language, file
     pdf.multi_cell(0, 8, content)
     
     # 5. Sig
-    if signature_path and os.path.exists(signature_path):
-        pdf.ln(10)
-        pdf.image(signature_path, w=40)
+    if signature is not None and (not isinstance(signature, str) or os.path.exists(signature)):
+        _draw_signature(pdf, signature)
     
     # 6. Footer
     pdf.set_y(-20)
     pdf.set_font(addr_font, '', 8)
     pdf.cell(0, 10, 'Dictated via VerbaPost.com', 0, 0, 'C')
+    return pdf
 
+def render_pdf(content, recipient_addr, return_addr, is_heirloom, language, signature=None, hand_font=None):
+    """Renders a letter entirely in memory and returns the PDF bytes (no temp file)."""
+    data = bytes(build_pdf(content, recipient_addr, return_addr, is_heirloom, language, signature, hand_font).output())
+    print(f"📄 Rendered {language} letter: {len(data) / 1024:.1f} KB")
+    return data
+
+def create_pdf(content, recipient_addr, return_addr, is_heirloom, language, filename="letter.pdf", signature_path=None):
+    """Legacy path-based API: writes /tmp/{filename} and returns the path. Prefer render_pdf()."""
     save_path = f"/tmp/{filename}"
-    pdf.output(save_path)
-    return save_path
\ No newline at end of file
+    with open(save_path, "wb") as f:
+        f.write(render_pdf(content, recipient_addr, return_addr, is_heirloom, language, signature_path))
+    return save_path
+
+# --- BATCH RENDERING ---
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def _init_render_worker(languages):
+    """Runs once per render process: parse the fonts up front so the first job isn't slower."""
+    for language in languages:
+        try:
+            load_fonts(FPDF(), language)
+        except Exception:
+            pass  # render_pdf falls back per job
+
+def _render_job(job):
+    return render_pdf(**job)
+
+def get_batch_pool(workers=None):
+    """Returns the process-wide render pool, creating it on first use."""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            workers = max(1, int(workers or BATCH_WORKERS))
+            # Spawn for the same reason as the transcription pool: never fork the threaded server
+            _batch_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+                initargs=(BATCH_LANGUAGES,),
+            )
+            print(f"🖨️ Render pool started ({workers} workers)")
+        return _batch_pool
+
+def shutdown_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is not None:
+            _batch_pool.shutdown(wait=False, cancel_futures=True)
+            _batch_pool = None
+
+def render_batch(jobs, ordered=True, workers=None):
+    """
+    Renders many letters across the render pool. Each job is a dict of render_pdf()
+    arguments (content, recipient_addr, return_addr, is_heirloom, language, signature, hand_font).
+    Yields (index, pdf_bytes) as letters finish: in job order when `ordered`
+    (each one as soon as everything before it is done), otherwise in completion order.
+    Single jobs, or workers=1, render inline without touching the pool.
+    """
+    jobs = list(jobs)
+    if len(jobs) <= 1 or workers == 1:
+        for i, job in enumerate(jobs):
+            yield i, render_pdf(**job)
+        return
+
+    pool = get_batch_pool(workers)
+    futures = {pool.submit(_render_job, job): i for i, job in enumerate(jobs)}
+    try:
+        if not ordered:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+            return
+        for future, i in futures.items():
+            yield i, future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+# --- TEMPLATES (one body, many recipients) ---
+class LetterTemplate:
+    """
+    Lays out and renders the shared letter once (body, date, return address, signature,
+    footer), then stamps a recipient block onto a copy for each recipient.
+    Stamping draws only the address into a one-page overlay, in the same face
+    build_pdf uses for addresses (Noto CJK for CJK letters, else the pack's sans),
+    and merges it, so N recipients cost N address blocks, not N full renders.
+    Without pypdf, or when only core Helvetica is available and the address
+    isn't Latin-1, stamp() falls back to a full render.
+    """
+    def __init__(self, content, return_addr, is_heirloom, language, signature=None, hand_font=None):
+        self.content = content
+        self.return_addr = return_addr
+        self.is_heirloom = is_heirloom
+        self.language = language
+        self.signature = signature
+        self.hand_font = hand_font
+        self.base = render_pdf(content, "", return_addr, is_heirloom, language, signature, hand_font)
+        self._reader = PdfReader(io.BytesIO(self.base)) if PYPDF_AVAILABLE else None
+
+    def stamp(self, recipient_addr):
+        """Returns the PDF bytes for one recipient."""
+        if self._reader is None:
+            return self._render(recipient_addr)
+
+        overlay = FPDF(format='Letter')
+        addr_font = None
+        if self.language in CJK_LANGUAGES and os.path.exists(CJK_PATH):
+            try:
+                register_font(overlay, 'NotoCJK', '', CJK_PATH)
+                addr_font = 'NotoCJK'
+            except Exception: pass
+        addr_font = addr_font or load_sans(overlay)
+        if addr_font == 'Helvetica' and not _core_font_safe(recipient_addr):
+            return self._render(recipient_addr)
+        _add_cjk_fallback(overlay, addr_font, recipient_addr)
+        overlay.add_page()
+        _draw_recipient(overlay, addr_font, recipient_addr)
+
+        writer = PdfWriter(clone_from=self._reader)
+        page = writer.pages[0]
+        page.merge_page(PdfReader(io.BytesIO(bytes(overlay.output()))).pages[0])
+        page.compress_content_streams()
+        out = io.BytesIO()
+        writer.write(out)
+        return out.getvalue()
+
+    def _render(self, recipient_addr):
+        return render_pdf(self.content, recipient_addr, self.return_addr,
+                          self.is_heirloom, self.language, self.signature, self.hand_font)
+
+def _core_font_safe(text):
+    try:
+        text.encode("latin-1")
+        return True
+    except UnicodeEncodeError:
+        return False
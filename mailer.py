@@ -1,5 +1,6 @@
 import streamlit as st
 import lob
+import io
 
 # Load API Key
 try:
@@ -7,9 +8,10 @@ try:
 except:
     pass
 
-def send_letter(pdf_path, to_address, from_address):
+def send_letter(pdf, to_address, from_address):
     """
     Sends a physical letter via Lob.
+    `pdf` is the rendered bytes (letter_format.render_pdf) or, for older callers, a file path.
     Handles key mapping (street -> address_line1) automatically.
     """
     try:
@@ -30,7 +32,13 @@ def send_letter(pdf_path, to_address, from_address):
         if not clean_to['address_line1']:
             return {"error": "Missing address line for recipient"}
 
-        with open(pdf_path, 'rb') as file:
+        if isinstance(pdf, (bytes, bytearray, memoryview)):
+            file = io.BytesIO(pdf)
+            file.name = "letter.pdf"  # Multipart uploads need a filename
+        else:
+            file = open(pdf, 'rb')
+
+        with file:
             response = lob.Letter.create(
                 description="VerbaPost Letter",
                 to_address=clean_to,
@@ -0,0 +1,80 @@
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+import transcribe_backends
+
+# One loaded backend per (engine, model size) for the whole process.
+# Nothing loads at import time: the first get_model() or warm() call does it.
+# At most MAX_MODELS stay loaded; the least recently used is dropped to make room,
+# so a worker that sees Standard and Heirloom jobs can't end up holding every size.
+MAX_MODELS = max(1, int(os.environ.get("VERBAPOST_MAX_MODELS", 2)))
+_models = OrderedDict()
+_metrics = {}
+_lock = threading.Lock()
+_load_locks = {}
+
+def _key(name, model_size):
+    return transcribe_backends.cache_name(name, model_size)
+
+def get_model(name=None, model_size=None):
+    """
+    Returns the shared backend, loading it on first use.
+    Concurrent callers for the same model wait on one load instead of each loading a copy.
+    Raises whatever the backend raised if loading failed.
+    """
+    key = _key(name, model_size)
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+
+    with _lock:
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+    with load_lock:
+        with _lock:
+            if key in _models:
+                _models.move_to_end(key)
+                return _models[key]
+        _metrics[key] = {"state": "loading", "started_at": time.time()}
+        print(f"🧠 Loading transcription model {key}...")
+        start = time.perf_counter()
+        try:
+            model = transcribe_backends.load_backend(name, model_size)
+        except Exception as e:
+            _metrics[key] = {"state": "failed", "error": str(e)}
+            print(f"Model loading error: {e}")
+            raise
+        load_seconds = time.perf_counter() - start
+        with _lock:
+            _models[key] = model
+            evicted = []
+            while len(_models) > MAX_MODELS:
+                old_key, _ = _models.popitem(last=False)
+                _metrics[old_key] = {"state": "evicted", "evicted_at": time.time()}
+                evicted.append(old_key)
+        for old_key in evicted:
+            print(f"♻️ Unloaded model {old_key} (keeping {MAX_MODELS} per worker)")
+        if evicted:
+            gc.collect()
+        _metrics[key] = {"state": "ready", "load_seconds": round(load_seconds, 2), "loaded_at": time.time()}
+        print(f"✅ Model {key} ready in {load_seconds:.1f}s")
+        return model
+
+def warm(name=None, model_size=None):
+    """Loads the model on a background thread so no request has to wait for it."""
+    def _load():
+        try: get_model(name, model_size)
+        except Exception: pass  # Recorded in status()
+    thread = threading.Thread(target=_load, name=f"warm-{_key(name, model_size)}", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready(name=None, model_size=None):
+    return _key(name, model_size) in _models
+
+def status():
+    """Per-model readiness and load-time metrics for this process."""
+    return {key: dict(info) for key, info in _metrics.items()}
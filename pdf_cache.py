@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import disk_store
+
+# --- CONFIG ---
+CACHE_DIR = os.environ.get("VERBAPOST_PDF_CACHE", ".pdf_cache")
+MAX_ENTRIES = int(os.environ.get("VERBAPOST_PDF_CACHE_ENTRIES", 500))
+MAX_BYTES = int(os.environ.get("VERBAPOST_PDF_CACHE_BYTES", 200 * 1024 * 1024))
+LAYOUT_VERSION = 3   # Bump when letter_format's layout changes so stale PDFs aren't served
+
+_store = disk_store.DiskStore(CACHE_DIR, ".pdf", MAX_ENTRIES, MAX_BYTES, "PDF cache")
+
+def letter_job(letter, content=None):
+    """
+    The render_pdf arguments for a queued letter as the admin prints it (Heirloom, English,
+    chosen face). Pass `content` when the letter was loaded without it.
+    """
+    author = letter.author
+    s_name = author.address_name if author else "VerbaPost User"
+    s_addr = f"{author.address_street}\n{author.address_city}, {author.address_state}" if author else ""
+    return {
+        "content": letter.content if content is None else content,
+        "recipient_addr": f"{letter.recipient_name}\n{letter.recipient_street}\n{letter.recipient_city}, {letter.recipient_state} {letter.recipient_zip}",
+        "return_addr": f"{s_name}\n{s_addr}",
+        "is_heirloom": True,
+        "language": "English",
+        "hand_font": letter.font,
+    }
+
+def content_digest(content):
+    """What Letter.content_digest stores: SHA-256 of the letter text."""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+def _key(job, digest):
+    fields = {k: v for k, v in job.items() if k != "content"}
+    payload = json.dumps({"job": fields, "content": digest, "layout": LAYOUT_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def make_key(job):
+    """SHA-256 of everything that ends up on the page: content, both addresses and render options."""
+    return _key(job, content_digest(job["content"]))
+
+def letter_key(letter):
+    """make_key() for a letter loaded without its content, from Letter.content_digest (None if unset)."""
+    if not letter.content_digest:
+        return None
+    return _key(letter_job(letter, content=""), letter.content_digest)
+
+def get(key):
+    """Returns the cached PDF bytes or None. A hit refreshes the entry's LRU position."""
+    return _store.get(key)
+
+def put(key, pdf):
+    _store.put(key, pdf)
+
+def render_letters(letters, fetch_contents=None):
+    """
+    Returns PDF bytes for each letter, in order. Cached copies are found by content digest
+    and served as-is; only letters whose content or addresses changed are rendered (in parallel).
+    For letters loaded with content deferred, pass fetch_contents(ids) -> {id: content};
+    it is called once, for the cache misses only.
+    """
+    keys = [letter_key(l) for l in letters]
+    pdfs = [get(key) if key else None for key in keys]
+    missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+    if not missing:
+        return pdfs
+
+    contents = fetch_contents([letters[i].id for i in missing]) if fetch_contents else {}
+    rendered = render_jobs([letter_job(letters[i], contents.get(letters[i].id)) for i in missing])
+    for i, pdf in zip(missing, rendered):
+        pdfs[i] = pdf
+    return pdfs
+
+def render_jobs(jobs):
+    import letter_format
+    keys = [make_key(job) for job in jobs]
+    pdfs = [get(key) for key in keys]
+
+    missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+    for j, pdf in letter_format.render_batch([jobs[i] for i in missing]):
+        i = missing[j]
+        pdfs[i] = pdf
+        put(keys[i], pdf)
+    return pdfs
+
+def prerender(job):
+    """Renders and stores a letter_job()'s PDF ahead of time (called when a letter is Queued)."""
+    try:
+        render_jobs([job])
+    except Exception as e:
+        print(f"❌ PDF pre-render failed: {e}")
+
+def stats():
+    """Hit/miss counters for this process plus the current on-disk footprint."""
+    return _store.stats()
+
+def clear():
+    _store.clear()
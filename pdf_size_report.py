@@ -0,0 +1,54 @@
+"""
+Bytes per generated letter, by language, with and without a signature.
+Run it before and after PDF changes to track what each Lob upload costs.
+
+Usage:
+    python3 pdf_size_report.py [--json sizes.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+from PIL import Image, ImageDraw
+import letter_format
+
+SAMPLE_BODIES = {
+    "English": "Dear Grandma,\n\nThank you so much for the birthday card. " * 12,
+    "Japanese": "おばあちゃんへ\n\nお誕生日カードを本当にありがとう。みんな元気にしています。" * 12,
+    "Chinese": "亲爱的奶奶：\n\n非常感谢您寄来的生日贺卡。我们全家都很好。" * 12,
+    "Korean": "할머니께\n\n생일 카드 정말 고마워요. 우리 가족은 모두 잘 지내고 있어요. " * 12,
+}
+RECIPIENT = "Jane Doe\n123 Main St\nNashville, TN 37201"
+SENDER = "John Doe\n456 Oak Ave\nMemphis, TN 38103"
+
+def sample_signature(path):
+    """A squiggle on a transparent 350x200 canvas, like st_canvas produces."""
+    img = Image.new("RGBA", (350, 200), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.line([(40, 140), (90, 60), (130, 150), (180, 70), (230, 140), (300, 90)], fill=(0, 0, 0, 255), width=3)
+    img.save(path)
+
+def measure():
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        sig_path = os.path.join(tmp, "signature.png")
+        sample_signature(sig_path)
+        for language, body in SAMPLE_BODIES.items():
+            plain = letter_format.render_pdf(body, RECIPIENT, SENDER, False, language)
+            signed = letter_format.render_pdf(body, RECIPIENT, SENDER, False, language, sig_path)
+            rows.append({"language": language, "bytes": len(plain), "bytes_signed": len(signed)})
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report generated PDF sizes per language.")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = measure()
+    print(f"\n{'language':<10}{'KB':>10}{'KB signed':>12}")
+    for r in rows:
+        print(f"{r['language']:<10}{r['bytes'] / 1024:>10.1f}{r['bytes_signed'] / 1024:>12.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"💾 Saved to {args.json}")
@@ -1,25 +1,180 @@
-import sounddevice as sd
-from scipy.io.wavfile import write
+import time
+import wave
+import threading
+from contextlib import nullcontext
 import numpy as np
 
-def record_audio(filename="test_recording.wav", duration=5):
-    # 1. Setup configuration
-    fs = 44100  # Sample rate (standard CD quality)
-    
+SAMPLE_RATE = 44100   # Sample rate (standard CD quality)
+CHUNK_FRAMES = 4096   # ~93ms per chunk at 44.1 kHz
+BUFFER_CHUNKS = 64    # ~6s of slack between the audio thread and the consumer
+
+class RingBuffer:
+    """
+    Fixed-size chunk queue between the audio callback and the consumer.
+    Memory is allocated once; if the consumer falls behind, the oldest chunk is overwritten.
+    """
+    def __init__(self, n_chunks=BUFFER_CHUNKS, chunk_frames=CHUNK_FRAMES, channels=1):
+        self.slots = np.zeros((n_chunks, chunk_frames, channels), dtype=np.float32)
+        self.lengths = np.zeros(n_chunks, dtype=np.int64)
+        self.head = 0        # Next slot to read
+        self.count = 0       # Filled slots
+        self.overruns = 0    # Chunks lost because the consumer was too slow
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, chunk):
+        """Called from the audio thread; never blocks."""
+        n_chunks, chunk_frames, _ = self.slots.shape
+        frames = min(len(chunk), chunk_frames)
+        with self._cond:
+            if self.count == n_chunks:
+                self.head = (self.head + 1) % n_chunks
+                self.count -= 1
+                self.overruns += 1
+            tail = (self.head + self.count) % n_chunks
+            self.slots[tail, :frames] = chunk[:frames]
+            self.lengths[tail] = frames
+            self.count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Returns the oldest chunk (a copy), or None once closed and drained / on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.count or self.closed, timeout):
+                return None
+            if not self.count:
+                return None
+            slot = self.head
+            chunk = self.slots[slot, :self.lengths[slot]].copy()
+            self.head = (self.head + 1) % len(self.slots)
+            self.count -= 1
+            return chunk
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class MicrophoneSource:
+    """Live capture through sounddevice; chunks arrive via a RingBuffer."""
+    def __init__(self, samplerate=SAMPLE_RATE, channels=1, chunk_frames=CHUNK_FRAMES, buffer_chunks=BUFFER_CHUNKS):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.chunk_frames = chunk_frames
+        self.buffer = RingBuffer(buffer_chunks, chunk_frames, channels)
+        self.stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"⚠️  {status}")
+        self.buffer.put(indata)
+
+    def __enter__(self):
+        import sounddevice as sd
+        self.stream = sd.InputStream(
+            samplerate=self.samplerate, channels=self.channels, dtype="float32",
+            blocksize=self.chunk_frames, callback=self._callback,
+        )
+        self.stream.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+        self.buffer.close()
+        if self.buffer.overruns:
+            print(f"⚠️  Dropped {self.buffer.overruns} chunks (consumer too slow)")
+
+    def __iter__(self):
+        while True:
+            chunk = self.buffer.get(timeout=1.0)
+            if chunk is None:
+                if self.buffer.closed:
+                    return
+                continue
+            yield chunk
+
+class FileSource:
+    """Plays a PCM WAV back in chunks; stands in for the microphone in tests and replays."""
+    def __init__(self, path, chunk_frames=CHUNK_FRAMES, realtime=False):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.realtime = realtime
+        self.wav = None
+
+    def __enter__(self):
+        self.wav = wave.open(self.path, "rb")
+        self.samplerate = self.wav.getframerate()
+        self.channels = self.wav.getnchannels()
+        if self.wav.getsampwidth() != 2:
+            raise ValueError("FileSource reads 16-bit PCM WAV only")
+        return self
+
+    def __exit__(self, *exc):
+        self.wav.close()
+
+    def __iter__(self):
+        while True:
+            raw = self.wav.readframes(self.chunk_frames)
+            if not raw:
+                return
+            chunk = np.frombuffer(raw, dtype="<i2").astype(np.float32).reshape(-1, self.channels) / 32768.0
+            if self.realtime:
+                time.sleep(len(chunk) / self.samplerate)
+            yield chunk
+
+class IncrementalWavWriter:
+    """Appends 16-bit PCM chunks to a WAV; the header sizes are patched on close."""
+    def __init__(self, filename, samplerate, channels=1):
+        self.wav = wave.open(filename, "wb")
+        self.wav.setnchannels(channels)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(samplerate)
+
+    def write(self, chunk):
+        pcm = (np.clip(chunk, -1.0, 1.0) * 32767).astype("<i2")
+        self.wav.writeframesraw(pcm.tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.wav.close()
+
+def stream_audio(source=None, duration=None, filename=None):
+    """
+    Yields float32 chunks shaped (frames, channels) as they are captured, so a transcriber
+    can start before recording ends. Stops after `duration` seconds (or when the source ends)
+    and, if `filename` is given, writes the WAV incrementally along the way.
+    """
+    source = source or MicrophoneSource()
+    with source:
+        max_frames = int(duration * source.samplerate) if duration else None
+        writer = IncrementalWavWriter(filename, source.samplerate, source.channels) if filename else nullcontext()
+        captured = 0
+        with writer:
+            for chunk in source:
+                if max_frames is not None:
+                    chunk = chunk[:max_frames - captured]
+                if filename:
+                    writer.write(chunk)
+                captured += len(chunk)
+                yield chunk
+                if max_frames is not None and captured >= max_frames:
+                    return
+
+def record_audio(filename="test_recording.wav", duration=5, source=None):
     print(f"🎙️  Recording for {duration} seconds... Speak now!")
-    
-    # 2. Start recording
-    # This captures raw audio data into the 'myrecording' variable
-    myrecording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
-    
-    # 3. Wait for the recording to finish
-    sd.wait()
-    
+
+    # Chunks go straight to disk; memory stays flat however long the recording is
+    frames = 0
+    for chunk in stream_audio(source, duration, filename):
+        frames += len(chunk)
+
     print("✅ Recording finished.")
-    
-    # 4. Save as a WAV file
-    write(filename, fs, myrecording)
     print(f"💾 Saved to {filename}")
+    return frames
 
 if __name__ == "__main__":
-    record_audio()
\ No newline at end of file
+    record_audio()
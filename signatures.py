@@ -0,0 +1,118 @@
+import io
+import numpy as np
+from PIL import Image
+
+SIGNATURE_WIDTH_MM = 40   # Printed width of the full 350px signature canvas
+INK_THRESHOLD = 128       # Pixels darker than this (after flattening onto white) are ink
+CROP_PADDING_PX = 2       # Keep the ends of strokes from touching the crop edge
+
+class Signature:
+    """
+    A signature cropped to its ink: a 1-bit mask packed 8 pixels per byte and, when the
+    canvas reported its strokes, the same strokes as vector paths (in canvas pixels,
+    relative to the crop). A few KB in session state instead of the 280 KB RGBA canvas.
+    """
+    def __init__(self, bits, shape, canvas_width, strokes=None, stroke_width=2.0):
+        self.bits = bits
+        self.shape = shape
+        self.canvas_width = canvas_width
+        self.strokes = strokes or []
+        self.stroke_width = stroke_width
+
+    @property
+    def width_mm(self):
+        """Printed width, keeping the canvas's scale (a small squiggle stays small)."""
+        return SIGNATURE_WIDTH_MM * self.shape[1] / self.canvas_width
+
+    @property
+    def height_mm(self):
+        return SIGNATURE_WIDTH_MM * self.shape[0] / self.canvas_width
+
+    def mask(self):
+        """Boolean (height, width) array, True where there is ink."""
+        h, w = self.shape
+        return np.unpackbits(self.bits, count=h * w).reshape(h, w).astype(bool)
+
+    def to_image(self):
+        """1-bit PIL image, black ink on white."""
+        return Image.fromarray(~self.mask())
+
+    def to_png(self):
+        """The mask as a 1-bit PNG, encoded in memory."""
+        buf = io.BytesIO()
+        self.to_image().save(buf, format="PNG", optimize=True)
+        return buf.getvalue()
+
+def ink_mask(image_data):
+    """
+    Thresholds an RGBA (or RGB / gray) canvas array to a boolean ink mask.
+    Transparent pixels count as white paper, so both transparent and
+    white-background canvases work.
+    """
+    data = np.asarray(image_data)
+    if data.ndim == 2:
+        gray = data.astype(np.float32)
+    else:
+        gray = data[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        if data.shape[-1] == 4:
+            alpha = data[..., 3].astype(np.float32) / 255.0
+            gray = 255.0 - alpha * (255.0 - gray)
+    return gray < INK_THRESHOLD
+
+def ink_bbox(mask):
+    """(top, bottom, left, right) of the ink, padded and clipped to the canvas; None if blank."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    h, w = mask.shape
+    return (
+        max(0, rows[0] - CROP_PADDING_PX), min(h, rows[-1] + 1 + CROP_PADDING_PX),
+        max(0, cols[0] - CROP_PADDING_PX), min(w, cols[-1] + 1 + CROP_PADDING_PX),
+    )
+
+def canvas_strokes(json_data, left=0, top=0):
+    """
+    Pulls freedraw paths out of the canvas's fabric.js JSON as lists of
+    (command, *coords) tuples with M / L / Q commands, shifted by (-left, -top).
+    """
+    strokes = []
+    for obj in (json_data or {}).get("objects", []):
+        if obj.get("type") != "path":
+            continue
+        stroke = []
+        for cmd in obj.get("path", []):
+            op, coords = cmd[0], cmd[1:]
+            if op not in ("M", "L", "Q") or len(coords) % 2:
+                continue
+            shifted = [c - (left if i % 2 == 0 else top) for i, c in enumerate(coords)]
+            stroke.append((op, *shifted))
+        if stroke:
+            strokes.append(stroke)
+    return strokes
+
+def from_canvas(image_data, json_data=None, stroke_width=2.0):
+    """
+    Builds a Signature from st_canvas output. Returns None for an empty canvas.
+    Pass the canvas's json_data to keep the strokes for vector rendering.
+    """
+    if image_data is None:
+        return None
+    mask = ink_mask(image_data)
+    bbox = ink_bbox(mask)
+    if bbox is None:
+        return None
+    top, bottom, left, right = bbox
+    cropped = mask[top:bottom, left:right]
+    return Signature(
+        np.packbits(cropped),
+        cropped.shape,
+        mask.shape[1],
+        canvas_strokes(json_data, left, top),
+        stroke_width,
+    )
+
+def from_image(image):
+    """Builds a Signature from a PIL image or an image file path (legacy signature PNGs)."""
+    img = Image.open(image) if isinstance(image, str) else image
+    return from_canvas(np.asarray(img.convert("RGBA")))
@@ -1,27 +1,186 @@
-import whisper
-import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import audio_io
+import ai_engine
+import transcript_cache
+import transcribe_backends
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac")
+
+def transcribe_audio(filename="test_recording.wav", language=None, tier=None):
+    # Repeat runs on the same bytes come straight from the on-disk cache
+    with open(filename, "rb") as f:
+        data = f.read()
+    cache_key = ai_engine.cache_key(data, language, tier)
+    text = transcript_cache.get(cache_key)
+
+    if text is None:
+        print("🧠 Loading the Whisper AI model... (This happens once)")
+        # Defaults to whisper 'base'. It's a good balance of speed vs accuracy.
+        model_size, options = ai_engine.resolve_decode(language, tier)
+        model = transcribe_backends.load_backend(model_size=model_size)
+        
+        print(f"🎧 Transcribing '{filename}'...")
+        
+        # The magic happens here
+        text = model.transcribe(audio_io.normalize_audio(data), **options)
+        transcript_cache.put(cache_key, text, model.cache_name)
+    else:
+        print(f"⚡ Cache hit for '{filename}'")
 
-def transcribe_audio(filename="test_recording.wav"):
-    print("🧠 Loading the Whisper AI model... (This happens once)")
-    # We use the 'base' model. It's a good balance of speed vs accuracy.
-    model = whisper.load_model("base")
-    
-    print(f"🎧 Transcribing '{filename}'...")
-    
-    # The magic happens here
-    result = model.transcribe(filename)
-    
-    text = result["text"]
     print("\n--- TRANSCRIPTION RESULT ---")
     print(text)
     print("----------------------------")
     
     return text
 
+# --- BATCH MODE ---
+def _init_batch_worker(torch_threads, language, tier):
+    """Each worker loads the model once and keeps it for every file it's handed."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    import model_manager
+    try:
+        model_manager.get_model(model_size=ai_engine.resolve_decode(language, tier)[0])
+    except Exception:
+        pass  # Each file then reports the load error in its own result row
+
+def _transcribe_file(path, language, tier):
+    import model_manager
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        # Check the cache before decoding: a resumed backfill shouldn't re-decode finished files
+        cache_key = ai_engine.cache_key(data, language, tier)
+        entry = transcript_cache.get_entry(cache_key)
+        if entry and "audio_seconds" in entry:
+            text, audio_seconds = entry["text"], entry["audio_seconds"]
+        else:
+            # Throughput is measured on the recording's full length, so take it before trimming
+            samples = audio_io.normalize_audio(data, trim=False)
+            audio_seconds = round(len(samples) / audio_io.SAMPLE_RATE, 2)
+            if entry:
+                text = entry["text"]
+            else:
+                model_size, options = ai_engine.resolve_decode(language, tier)
+                model = model_manager.get_model(model_size=model_size)
+                text = model.transcribe(audio_io.trim_silence(samples), **options)
+            transcript_cache.put(cache_key, text, entry["model"] if entry else model.cache_name, audio_seconds)
+        return {
+            "path": path,
+            "text": text,
+            "audio_seconds": audio_seconds,
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+    except Exception as e:
+        return {"path": path, "error": str(e), "seconds": round(time.perf_counter() - start, 2)}
+
+def list_inputs(source):
+    """A directory (scanned for audio files) or a manifest with one path per line."""
+    if os.path.isdir(source):
+        return [
+            os.path.join(source, name) for name in sorted(os.listdir(source))
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        ]
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [line if os.path.isabs(line) else os.path.join(base_dir, line) for line in lines]
+
+def load_done(out_path):
+    """Paths that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # A torn last line from an interrupted run
+            if "text" in row:
+                done.add(row["path"])
+    return done
+
+def drop_torn_line(out_path, chunk=64 * 1024):
+    """
+    Truncates the output file back to its last newline, removing the partial row an
+    interrupted run leaves behind, so the next appended row starts on a line of its own.
+    """
+    if not os.path.exists(out_path):
+        return
+    with open(out_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(chunk, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos < end:
+            f.truncate(pos)
+            print(f"✂️ Dropped a partial last line ({end - pos} bytes) from {out_path}")
+
+def transcribe_batch(source, out_path, workers=None, torch_threads=1, language=None, tier=None):
+    files = list_inputs(source)
+    done = load_done(out_path)
+    todo = [p for p in files if p not in done]
+    print(f"📂 {len(files)} files, {len(done & set(files))} already done, {len(todo)} to go")
+    if not todo:
+        return
+    drop_torn_line(out_path)
+
+    workers = workers or max(1, (os.cpu_count() or 2) // torch_threads)
+    audio_seconds = 0.0
+    failures = 0
+    start = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_batch_worker, initargs=(torch_threads, language, tier)
+    ) as pool:
+        futures = [pool.submit(_transcribe_file, path, language, tier) for path in todo]
+        for i, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            # One line per file, flushed immediately, so an interrupted run can resume
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            if "error" in row:
+                failures += 1
+                print(f"❌ [{i}/{len(todo)}] {row['path']}: {row['error']}")
+            else:
+                audio_seconds += row["audio_seconds"]
+                print(f"✅ [{i}/{len(todo)}] {row['path']} ({row['audio_seconds']}s audio)")
+
+    wall = time.perf_counter() - start
+    print("\n--- BATCH SUMMARY ---")
+    print(f"Files: {len(todo) - failures} ok, {failures} failed, {workers} workers")
+    print(f"Throughput: {audio_seconds / wall:.2f} audio-seconds per wall-second ({audio_seconds:.0f}s audio in {wall:.0f}s)")
+
 if __name__ == "__main__":
     # This allows you to run "python3 transcribe.py" to test the default file
     # OR "python3 transcribe.py my_other_file.wav" to test a specific one
-    if len(sys.argv) > 1:
-        transcribe_audio(sys.argv[1])
+    # OR "python3 transcribe.py --batch recordings/ --out results.jsonl" for a backfill
+    parser = argparse.ArgumentParser(description="Transcribe one file, or a whole directory/manifest in parallel.")
+    parser.add_argument("filename", nargs="?", default="test_recording.wav")
+    parser.add_argument("--batch", help="Directory of audio files, or a manifest with one path per line")
+    parser.add_argument("--out", default="transcripts.jsonl", help="JSONL results file (resumed if it exists)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: cores / torch threads)")
+    parser.add_argument("--torch-threads", type=int, default=1, help="Torch threads per worker")
+    parser.add_argument("--language", choices=sorted(ai_engine.LANGUAGE_CODES), help="Skip language detection")
+    parser.add_argument("--tier", choices=sorted(ai_engine.DECODE_PROFILES), help="Decode profile (default Standard)")
+    args = parser.parse_args()
+
+    if args.batch:
+        transcribe_batch(args.batch, args.out, args.workers, args.torch_threads, args.language, args.tier)
     else:
-        transcribe_audio()
\ No newline at end of file
+        transcribe_audio(args.filename, args.language, args.tier)
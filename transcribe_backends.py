@@ -0,0 +1,60 @@
+import os
+
+# --- CONFIG ---
+# Pick the engine with environment variables (read by the app, the pool workers and the CLI):
+#   VERBAPOST_STT_BACKEND = whisper | ct2
+#   VERBAPOST_STT_MODEL   = tiny | base | small | ...
+DEFAULT_BACKEND = os.environ.get("VERBAPOST_STT_BACKEND", "whisper")
+DEFAULT_MODEL = os.environ.get("VERBAPOST_STT_MODEL", "base")
+
+def cache_name(name=None, model_size=None):
+    """Identifies an engine + model in transcript cache keys, without loading it."""
+    return f"{name or DEFAULT_BACKEND}:{model_size or DEFAULT_MODEL}"
+
+class WhisperBackend:
+    """The original openai-whisper engine: fp32 PyTorch."""
+    name = "whisper"
+
+    def __init__(self, model_size=DEFAULT_MODEL):
+        import whisper
+        self.model_size = model_size
+        self.model = whisper.load_model(model_size)
+
+    @property
+    def cache_name(self):
+        return cache_name(self.name, self.model_size)
+
+    def transcribe(self, audio, **options):
+        """audio is a file path or a 16 kHz float32 array."""
+        return self.model.transcribe(audio, **options)["text"]
+
+class CTranslate2Backend:
+    """faster-whisper (CTranslate2) with int8 weights: same models, a fraction of the CPU time and memory."""
+    name = "ct2"
+
+    def __init__(self, model_size=DEFAULT_MODEL, compute_type="int8", cpu_threads=0):
+        from faster_whisper import WhisperModel
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+    @property
+    def cache_name(self):
+        return cache_name(self.name, self.model_size)
+
+    def transcribe(self, audio, **options):
+        # Segments are a lazy generator; joining them runs the decode
+        segments, _info = self.model.transcribe(audio, **options)
+        return "".join(segment.text for segment in segments)
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+def load_backend(name=None, model_size=None):
+    """Builds the configured backend. Raises ValueError for an unknown name."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend '{name}'. Options: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_size or DEFAULT_MODEL)
@@ -0,0 +1,49 @@
+import os
+import json
+import time
+import hashlib
+import disk_store
+
+# --- CONFIG ---
+CACHE_DIR = os.environ.get("VERBAPOST_TRANSCRIPT_CACHE", ".transcript_cache")
+MAX_ENTRIES = int(os.environ.get("VERBAPOST_TRANSCRIPT_CACHE_ENTRIES", 1000))
+MAX_BYTES = int(os.environ.get("VERBAPOST_TRANSCRIPT_CACHE_BYTES", 50 * 1024 * 1024))
+
+_store = disk_store.DiskStore(CACHE_DIR, ".json", MAX_ENTRIES, MAX_BYTES, "Transcript cache")
+
+def make_key(audio_bytes, model_name, options=None):
+    """SHA-256 of the audio bytes, salted with the model name and decode options."""
+    digest = hashlib.sha256(audio_bytes).hexdigest()
+    salt = json.dumps({"model": model_name, "options": options or {}}, sort_keys=True)
+    return hashlib.sha256(f"{digest}:{salt}".encode("utf-8")).hexdigest()
+
+def get_entry(key):
+    """Returns the cached entry (text, model, created, and audio_seconds if recorded) or None."""
+    data = _store.get(key)
+    if data is None:
+        return None
+    try:
+        entry = json.loads(data)
+        entry["text"]
+        return entry
+    except (ValueError, KeyError, TypeError):
+        _store.reject(key)
+        return None
+
+def get(key):
+    """Returns the cached transcript or None. A hit refreshes the entry's LRU position."""
+    entry = get_entry(key)
+    return entry["text"] if entry else None
+
+def put(key, text, model_name=None, audio_seconds=None):
+    payload = {"text": text, "model": model_name, "created": time.time()}
+    if audio_seconds is not None:
+        payload["audio_seconds"] = audio_seconds
+    _store.put(key, json.dumps(payload).encode("utf-8"))
+
+def stats():
+    """Hit/miss counters for this process plus the current on-disk footprint."""
+    return _store.stats()
+
+def clear():
+    _store.clear()
@@ -0,0 +1,266 @@
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout, as_completed
+
+import streamlit as st
+import audio_io
+import transcript_cache
+
+# --- CONFIG ---
+# Override in Streamlit Secrets:
+# [transcription]
+# workers = 2
+# torch_threads = 1
+# job_timeout = 300
+# warm_on_start = true
+DEFAULTS = {
+    "workers": 2,          # Max simultaneous Whisper runs per process
+    "torch_threads": 1,    # Torch intra-op threads per worker
+    "job_timeout": 300,    # Seconds from submit until a job is given up on
+    "warm_on_start": True, # Spawn workers and load models when the app process starts
+}
+JOB_RETENTION = 15 * 60   # Forget finished jobs after 15 minutes
+
+def _load_config():
+    config = dict(DEFAULTS)
+    try:
+        config.update(st.secrets.get("transcription", {}))
+    except Exception:
+        pass
+    return config
+
+CONFIG = _load_config()
+
+_pool = None
+_pool_lock = threading.Lock()
+_warm_futures = []
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+# --- WORKER SIDE ---
+def _init_worker(torch_threads):
+    """Runs once per worker process: pin torch threads, then load the model."""
+    try:
+        import torch
+        torch.set_num_threads(int(torch_threads))
+    except ImportError:
+        pass
+    import model_manager
+    try:
+        # The Standard/English model serves most letters; other profiles load on first use
+        import ai_engine
+        model_manager.get_model(model_size=ai_engine.resolve_decode("English", ai_engine.DEFAULT_TIER)[0])
+    except Exception:
+        pass  # ai_engine reports "model not loaded" per job; don't break the pool
+
+def _worker_model_status():
+    import os
+    import model_manager
+    return {"pid": os.getpid(), "models": model_manager.status()}
+
+def _run_transcription(audio, language, tier):
+    import ai_engine
+    return ai_engine.transcribe_audio(audio, language, tier)
+
+def _cached_result(data, language, tier):
+    import ai_engine
+    return transcript_cache.get(ai_engine.cache_key(data, language, tier))
+
+def _run_segment(audio, language, tier):
+    import ai_engine
+    return ai_engine.transcribe_array(audio, language, tier)
+
+# --- POOL ---
+def get_pool():
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, int(CONFIG["workers"]))
+            # Spawn, not fork: the Streamlit server has live threads (and locks) that a
+            # forked child would inherit mid-state
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(CONFIG["torch_threads"],),
+            )
+            print(f"🧠 Transcription pool started ({workers} workers)")
+        return _pool
+
+def warmup():
+    """
+    Spawns every worker and has it load its model, without blocking the caller.
+    Progress is visible through model_status().
+    """
+    pool = get_pool()
+    workers = max(1, int(CONFIG["workers"]))
+    with _pool_lock:
+        _warm_futures[:] = [pool.submit(_worker_model_status) for _ in range(workers)]
+
+def _default_model_key():
+    import ai_engine
+    import transcribe_backends
+    return transcribe_backends.cache_name(model_size=ai_engine.resolve_decode("English", ai_engine.DEFAULT_TIER)[0])
+
+def model_status():
+    """
+    Readiness and load-time metrics from the workers that answered a warm-up task.
+    The pool decides which worker runs each task, so reports are grouped by pid;
+    `ready` means every worker heard from has the default (Standard/English) model loaded.
+    """
+    by_pid = {}
+    for future in list(_warm_futures):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            report = future.result()
+            by_pid[report["pid"]] = report  # Later reports from the same worker are no older
+    default_key = _default_model_key()
+    default_ready = {
+        pid: report["models"].get(default_key, {}).get("state") == "ready"
+        for pid, report in by_pid.items()
+    }
+    return {
+        "workers": max(1, int(CONFIG["workers"])),
+        "warmed": len(by_pid),
+        "default_model": default_key,
+        "ready": bool(by_pid) and all(default_ready.values()),
+        "load_seconds": {
+            pid: report["models"].get(default_key, {}).get("load_seconds")
+            for pid, report in by_pid.items()
+        },
+        "reports": list(by_pid.values()),
+    }
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+# --- JOBS ---
+def _purge_old_jobs():
+    cutoff = time.time() - JOB_RETENTION
+    with _jobs_lock:
+        for job_id in [j for j, job in _jobs.items() if job["future"].done() and job["submitted"] < cutoff]:
+            del _jobs[job_id]
+
+def submit_transcription(audio, timeout=None, language=None, tier=None):
+    """
+    Queues audio (bytes, a buffer or a file path) for transcription and returns a job id.
+    language / tier pick the decode profile (see ai_engine.resolve_decode).
+    """
+    _purge_old_jobs()
+    data = audio_io.as_buffer(audio)
+    cached = _cached_result(data, language, tier)
+    if cached is not None:
+        # Repeat of audio we've already transcribed: skip the queue entirely
+        future = Future()
+        future.set_result(cached)
+    else:
+        future = get_pool().submit(_run_transcription, bytes(data), language, tier)
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "future": future,
+            "submitted": time.time(),
+            "timeout": timeout or CONFIG["job_timeout"],
+            "timed_out": False,
+        }
+    return job_id
+
+def get_job(job_id):
+    """
+    Non-blocking status check. Returns a dict with 'status'
+    (queued, running, done, error, timeout, unknown) plus 'text' or 'error'.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if not job:
+        return {"status": "unknown", "error": "Job not found."}
+
+    future = job["future"]
+    elapsed = time.time() - job["submitted"]
+    info = {"status": "queued", "elapsed": elapsed}
+
+    if future.done():
+        if future.cancelled():
+            info["status"] = "timeout" if job["timed_out"] else "error"
+            info["error"] = "Transcription timed out." if job["timed_out"] else "Transcription cancelled."
+        elif future.exception() is not None:
+            info["status"] = "error"
+            info["error"] = str(future.exception())
+        else:
+            info["status"] = "done"
+            info["text"] = future.result()
+    elif job["timed_out"] or elapsed > job["timeout"]:
+        # A running Whisper call cannot be interrupted; the result is simply discarded.
+        job["timed_out"] = True
+        future.cancel()
+        info["status"] = "timeout"
+        info["error"] = "Transcription timed out."
+    elif future.running():
+        info["status"] = "running"
+    return info
+
+def wait_for_job(job_id, timeout=None):
+    """Blocks until the job finishes or its deadline passes, then returns get_job()."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if not job:
+        return get_job(job_id)
+
+    deadline = job["submitted"] + (timeout or job["timeout"])
+    try:
+        job["future"].result(timeout=max(0, deadline - time.time()))
+    except FutureTimeout:
+        job["timed_out"] = True
+        job["future"].cancel()
+    except Exception:
+        pass  # Reported by get_job()
+    return get_job(job_id)
+
+# --- SEGMENTED STREAMING ---
+def stream_transcription(audio, timeout=None, max_bytes=None, language=None, tier=None):
+    """
+    Splits the recording on pauses and transcribes the pieces in parallel.
+    Yields (index, text, total) as each segment finishes, in completion order;
+    callers put the pieces back in order with audio_segmenter.stitch().
+    Raises TimeoutError if the whole recording isn't done in time,
+    ValueError if it is larger than max_bytes.
+    """
+    import ai_engine
+    import audio_segmenter
+
+    data = audio_io.as_buffer(audio)
+    audio_io.check_size(data, max_bytes)
+    cache_key = ai_engine.cache_key(data, language, tier)
+    cached = transcript_cache.get(cache_key)
+    if cached is not None:
+        yield 0, cached, 1
+        return
+
+    samples = audio_segmenter.load_audio(data)
+    spans = audio_segmenter.split_on_silence(samples)
+    if not spans:
+        yield 0, "", 1
+        return
+
+    pool = get_pool()
+    futures = {pool.submit(_run_segment, samples[start:end], language, tier): i for i, (start, end) in enumerate(spans)}
+    texts = [""] * len(spans)
+    try:
+        for future in as_completed(futures, timeout=timeout or CONFIG["job_timeout"]):
+            i = futures[future]
+            texts[i] = future.result()
+            yield i, texts[i], len(spans)
+    except FutureTimeout:
+        raise TimeoutError("Transcription timed out.")
+    finally:
+        for future in futures:
+            future.cancel()
+
+    # Only reached when every segment succeeded; a failed one raised out of the loop above
+    transcript_cache.put(cache_key, audio_segmenter.stitch(texts))
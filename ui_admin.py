@@ -1,6 +1,6 @@
 import streamlit as st
 import database
-import letter_format
+import pdf_cache
 import os
 import pandas as pd
 
@@ -24,9 +24,16 @@ def show_admin():
             st.rerun()
         st.stop()
 
-    # 3. Fetch Data
+    # 3. Fetch Data (one page at a time; cursors[i] is where page i starts)
+    if "admin_cursors" not in st.session_state:
+        st.session_state.admin_cursors = [None]
+    cursors = st.session_state.admin_cursors
     try:
-        queue = database.get_admin_queue()
+        queue, pending_count, next_after = database.get_admin_queue_page(after=cursors[-1])
+        if not queue and len(cursors) > 1:
+            # This page emptied out (orders mailed); start over from the newest
+            cursors[:] = [None]
+            queue, pending_count, next_after = database.get_admin_queue_page()
     except Exception as e:
         st.error(f"Database Connection Error: {e}")
         return
@@ -34,7 +41,6 @@ def show_admin():
     # 4. Business Stats
     col1, col2, col3 = st.columns(3)
     
-    pending_count = len(queue)
     estimated_value = pending_count * 5.99 
     
     col1.metric("Pending Orders", pending_count, delta_color="inverse")
@@ -50,40 +56,60 @@ def show_admin():
         return
 
     # 5. The Work List
-    for l in queue:
+    # PDFs are rendered when a letter is queued and found again by content digest;
+    # full text is fetched only for letters that have to be (re-)rendered
+    pdfs = pdf_cache.render_letters(queue, database.get_letter_contents)
+
+    # Batch fulfillment: tick what went out, then mark it all mailed in one UPDATE
+    page_ids = [l.id for l in queue]
+    def select_page(value):
+        for lid in page_ids:
+            st.session_state[f"pick_{lid}"] = value
+    selected = [lid for lid in page_ids if st.session_state.get(f"pick_{lid}")]
+    b1, b2, b3 = st.columns([1, 1, 2])
+    b1.button("☑️ Select Page", on_click=select_page, args=(True,))
+    b2.button("Clear", on_click=select_page, args=(False,))
+    if b3.button(f"✅ Mark {len(selected)} Selected Mailed", type="primary", disabled=not selected):
+        done = database.update_status_bulk(selected, "Queued", "Sent")
+        for lid in selected:
+            st.session_state.pop(f"pick_{lid}", None)
+        st.toast(f"{len(done)} orders archived!")
+        st.rerun()
+
+    for i, l in enumerate(queue):
         with st.container(border=True):
             c1, c2 = st.columns([3, 1])
             
             with c1:
-                st.markdown(f"**To:** {l.recipient_name}")
+                st.checkbox(f"**To:** {l.recipient_name}", key=f"pick_{l.id}")
                 st.caption(f"📍 {l.recipient_street}, {l.recipient_city}, {l.recipient_state} {l.recipient_zip}")
-                st.text(f"Message Preview: {l.content[:75]}...")
+                st.text(f"Message Preview: {l.preview}...")
                 st.caption(f"Ordered: {l.created_at.strftime('%b %d, %I:%M %p')}")
 
             with c2:
-                # GENERATE PDF
-                s_name = l.author.address_name if l.author else "VerbaPost User"
-                s_addr = f"{l.author.address_street}\n{l.author.address_city}, {l.author.address_state}" if l.author else ""
-                
-                s_str = f"{s_name}\n{s_addr}"
-                r_str = f"{l.recipient_name}\n{l.recipient_street}\n{l.recipient_city}, {l.recipient_state} {l.recipient_zip}"
+                pdf_bytes = pdfs[i]
                 
-                # Generate filename
-                pdf_path = letter_format.create_pdf(
-                    l.content, r_str, s_str, True, "English", f"order_{l.id}.pdf", None
+                st.download_button(
+                    "🖨️ Print PDF", 
+                    data=pdf_bytes, 
+                    file_name=f"VerbaPost_Order_{l.id}.pdf", 
+                    mime="application/pdf",
+                    key=f"dl_{l.id}"
                 )
                 
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        "🖨️ Print PDF", 
-                        data=f, 
-                        file_name=f"VerbaPost_Order_{l.id}.pdf", 
-                        mime="application/pdf",
-                        key=f"dl_{l.id}"
-                    )
-                
                 # MARK AS SENT
                 if st.button("✅ Mark Mailed", key=f"sent_{l.id}", type="primary"):
-                    database.update_letter_status(l.id, "Sent")
+                    database.update_status_bulk([l.id], "Queued", "Sent")
                     st.toast(f"Order #{l.id} Archived!")
                     st.rerun()
+
+    # 6. Paging
+    first = (len(cursors) - 1) * database.ADMIN_PAGE_SIZE + 1
+    p1, p2, p3 = st.columns([1, 2, 1])
+    if p1.button("⬅️ Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    p2.caption(f"Showing {first}–{first + len(queue) - 1} of {pending_count}")
+    if p3.button("Older ➡️", disabled=next_after is None):
+        cursors.append(next_after)
+        st.rerun()
@@ -1,7 +1,6 @@
 import streamlit as st
 from streamlit_drawable_canvas import st_canvas
 import os
-from PIL import Image
 from datetime import datetime
 import urllib.parse
 import io
@@ -111,8 +110,12 @@ def show_main_app():
     # LAZY IMPORTS 
     # -----------------------------------------------------------
     import ai_engine 
+    import transcription_engine
+    import audio_segmenter
     import database
     import letter_format
+    import signatures
+    import font_pack
     import mailer
     import zipcodes
     import payment_engine
@@ -143,6 +146,7 @@ def show_main_app():
         "stripe_url": None,
         "locked_tier": "Standard",
         "sig_data": None,
+        "hand_font": None,
         "selected_language": "English"
     }
     for k, v in defaults.items():
@@ -215,6 +219,14 @@ def show_main_app():
                     st.success(f"Code: `{code}`")
                     st.info("Copy this code now.")
                 
+                st.divider()
+                st.write("**Transcription Models:**")
+                st.json(transcription_engine.model_status(), expanded=False)
+
+                st.divider()
+                st.write("**Database Pool:**")
+                st.json(database.pool_stats(), expanded=False)
+
                 st.divider()
                 st.write("**Active Codes:**")
                 # Optional: display active codes for admin
@@ -336,11 +348,23 @@ def show_main_app():
                 st.session_state.from_state = from_state; st.session_state.from_zip = from_zip
                 st.toast("Addresses Saved!")
 
+        # Heirloom: pick the handwriting face (bundled fonts only)
+        if is_heirloom and not is_civic:
+            choices = font_pack.handwriting_choices()
+            if choices:
+                families = list(choices)
+                current = st.session_state.hand_font if st.session_state.hand_font in choices else families[0]
+                st.session_state.hand_font = st.selectbox(
+                    "✍️ Handwriting Style", families, index=families.index(current), format_func=choices.get
+                )
+
         # Signature Canvas
         st.divider()
         st.subheader("2. Sign")
         canvas_result = st_canvas(fill_color="rgba(255, 165, 0, 0.3)", stroke_width=2, stroke_color="#000", background_color="#fff", height=200, width=350, drawing_mode="freedraw", key="sig")
-        if canvas_result.image_data is not None: st.session_state.sig_data = canvas_result.image_data
+        if canvas_result.image_data is not None:
+            # Keep the cropped 1-bit ink + strokes, not the full RGBA canvas
+            st.session_state.sig_data = signatures.from_canvas(canvas_result.image_data, canvas_result.json_data)
 
         # Dictation
         st.divider()
@@ -357,12 +381,17 @@ def show_main_app():
 
         if audio_val:
             with st.status("Processing...", expanded=True):
-                path = "temp.wav"
-                with open(path, "wb") as f: f.write(audio_val.getvalue())
-                st.session_state.audio_path = path
                 try:
-                    text = ai_engine.transcribe_audio(path)
-                    st.session_state.transcribed_text = text
+                    # Segments finish out of order; show the text so far as each one lands
+                    progress = st.progress(0.0, text="⏳ Transcribing...")
+                    preview = st.empty()
+                    parts = {}
+                    for idx, text, total in transcription_engine.stream_transcription(
+                            audio_val.getvalue(), max_bytes=MAX_BYTES_THRESHOLD, language=locked_lang, tier=locked_tier):
+                        parts[idx] = text
+                        progress.progress(len(parts) / total, text=f"⏳ Transcribed {len(parts)} of {total} parts")
+                        preview.caption(audio_segmenter.stitch([parts.get(i, "…") for i in range(total)]))
+                    st.session_state.transcribed_text = audio_segmenter.stitch([parts[i] for i in sorted(parts)])
                     st.session_state.app_mode = "review"
                     st.rerun()
                 except Exception as e: st.error(f"Error: {e}")
@@ -394,13 +423,8 @@ def show_main_app():
         fr_c = st.session_state.get("from_city", ""); fr_st = st.session_state.get("from_state", "")
         fr_z = st.session_state.get("from_zip", "")
         
-        sig_path = None
-        if st.session_state.get("sig_data") is not None:
-            try:
-                img = Image.fromarray(st.session_state.sig_data.astype('uint8'), 'RGBA')
-                sig_path = "temp_signature.png"
-                img.save(sig_path)
-            except: pass
+        sig = st.session_state.get("sig_data")
+        hand_font = st.session_state.get("hand_font") if is_heirloom else None
 
         with st.status("Sending...", expanded=True):
             today_str = datetime.now().strftime("%Y-%m-%d")
@@ -414,24 +438,26 @@ def show_main_app():
                 if not targets: st.error("No Reps."); st.stop()
                 files = []
                 addr_from = {'name': fr_n, 'address_line1': fr_s, 'address_city': fr_c, 'address_state': fr_st, 'address_zip': fr_z}
+                # Same letter to every legislator: lay it out once, stamp each address block
+                template = letter_format.LetterTemplate(st.session_state.transcribed_text, f"{fr_n}\n{fr_s}...", False, locked_lang, sig)
                 for t in targets:
                     t_addr = t['address_obj']
                     t_lob = {'name': t['name'], 'address_line1': t_addr['street'], 'address_city': t_addr['city'], 'address_state': t_addr['state'], 'address_zip': t_addr['zip']}
-                    pdf = letter_format.create_pdf(st.session_state.transcribed_text, f"{t['name']}\n{t_addr['street']}", f"{fr_n}\n{fr_s}...", False, locked_lang, f"{t['name']}.pdf", sig_path)
-                    files.append(pdf)
+                    pdf = template.stamp(f"{t['name']}\n{t_addr['street']}")
+                    files.append((f"{t['name']}.pdf", pdf))
                     mailer.send_letter(pdf, t_lob, addr_from)
                 
                 zip_buffer = io.BytesIO()
                 with zipfile.ZipFile(zip_buffer, "w") as zf:
-                    for f in files: zf.write(f, os.path.basename(f))
+                    for name, data in files: zf.writestr(name, data)
                 st.download_button("📦 Download All", zip_buffer.getvalue(), f"VerbaPost_Civic_{today_str}.zip")
             
             else:
-                pdf = letter_format.create_pdf(
+                pdf = letter_format.render_pdf(
                     st.session_state.transcribed_text, 
                     f"{to_n}\n{to_s}\n{to_c}, {to_st} {to_z}", 
                     f"{fr_n}\n{fr_s}\n{fr_c}, {fr_st} {fr_z}", 
-                    is_heirloom, locked_lang, filename_pdf, sig_path
+                    is_heirloom, locked_lang, sig, hand_font
                 )
                 
                 if not is_heirloom:
@@ -440,7 +466,7 @@ def show_main_app():
                      mailer.send_letter(pdf, addr_to, addr_from)
                 else:
                      if "letter_id" in st.query_params:
-                         database.update_letter_status(st.query_params["letter_id"], "Queued", st.session_state.transcribed_text)
+                         database.update_letter_status(st.query_params["letter_id"], "Queued", st.session_state.transcribed_text, font=hand_font)
                      
                      # --- SEND HEIRLOOM ALERT ---
                      # Added email alert logic here as requested
@@ -456,8 +482,7 @@ Please log in to the admin console or check Supabase to fulfill this order.
                      """
                      send_admin_alert(alert_subject, alert_body)
 
-                with open(pdf, "rb") as f:
-                    st.download_button("Download Copy", f, filename_pdf)
+                st.download_button("Download Copy", pdf, filename_pdf, mime="application/pdf")
 
             st.write("✅ Done!")
             if st.session_state.get("user"):
@@ -39,6 +39,29 @@ def inject_custom_css():
         """, unsafe_allow_html=True)
 inject_custom_css()
 
+# Warm the transcription workers once per server process, in the background,
+# so the first dictation doesn't pay for the model load.
+@st.cache_resource
+def start_model_warmup():
+    import transcription_engine
+    if transcription_engine.CONFIG.get("warm_on_start"):
+        transcription_engine.warmup()
+    return True
+start_model_warmup()
+
+# Check the vendored fonts and bring the schema up to date once per server process.
+# Rendering never downloads anything; a bad font file just isn't offered.
+@st.cache_resource
+def startup_checks():
+    import font_pack
+    font_pack.verify()
+    try:
+        database.init_db()
+    except Exception as e:
+        print(f"❌ DB init failed: {e}")
+    return True
+startup_checks()
+
 # 4. HANDLERS
 def handle_login(email, password):
     user, error = auth_engine.sign_in(email, password)